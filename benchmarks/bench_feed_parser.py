@@ -0,0 +1,162 @@
+"""
+Compares FeedParser with feedparser on large generated RSS 2.0 and Atom feeds.
+
+Each case runs in a fresh subprocess. Memory is the growth of the peak resident set size while
+parsing, so it includes the C allocations of libxml2 that tracemalloc does not see. The peak is
+VmHWM of /proc/self/status on Linux, where ru_maxrss keeps the peak of the parent across exec,
+and ru_maxrss elsewhere.
+The subprocess loads feed_parser.py by path so that the heavy imports of the package do not raise
+the baseline above the peak of the parse.
+
+Usage:
+    uv run python benchmarks/bench_feed_parser.py [--entries 5000] [--repeat 5]
+"""
+
+import argparse
+import importlib.util
+import pathlib
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from functools import partial
+from itertools import islice
+from typing import TYPE_CHECKING
+
+import feedparser
+
+if TYPE_CHECKING:
+    from tech_feeds_digest.feed_parser import FeedEntry
+
+FEED_PARSER_PATH = pathlib.Path(__file__).parent.parent / "tech_feeds_digest" / "feed_parser.py"
+# Loaded without the package __init__, which imports polars and langchain
+spec = importlib.util.spec_from_file_location("feed_parser", FEED_PARSER_PATH)
+assert spec is not None and spec.loader is not None
+feed_parser = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(feed_parser)
+
+
+def make_rss(n: int) -> bytes:
+    now = datetime(2025, 5, 1, 12, 0)
+    items = "".join(
+        f"""<item>
+<title><![CDATA[Article {i}]]></title>
+<description><![CDATA[{"Lorem ipsum dolor sit amet. " * 20}]]></description>
+<link>https://zenn.dev/user{i}/articles/{i:08x}</link>
+<guid isPermaLink="true">https://zenn.dev/user{i}/articles/{i:08x}</guid>
+<pubDate>{(now - timedelta(minutes=i)).strftime("%a, %d %b %Y %H:%M:%S GMT")}</pubDate>
+<enclosure url="https://res.cloudinary.com/zenn/image/{i}.png" length="0" type="image/png"/>
+<dc:creator>user{i}</dc:creator>
+</item>"""
+        for i in range(n)
+    )
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/"><channel><title>Zenn</title>{items}</channel></rss>""".encode()
+
+
+def make_atom(n: int) -> bytes:
+    now = datetime(2025, 5, 1, 12, 0)
+    entries = "".join(
+        f"""<entry>
+<id>tag:qiita.com,2005:PublicArticle/{i}</id>
+<published>{(now - timedelta(minutes=i)).isoformat()}+09:00</published>
+<updated>{(now - timedelta(minutes=i)).isoformat()}+09:00</updated>
+<link rel="alternate" type="text/html" href="https://qiita.com/user{i}/items/{i:020x}"/>
+<url>https://qiita.com/user{i}/items/{i:020x}</url>
+<title>Article {i}</title>
+<content type="html">{"Lorem ipsum dolor sit amet. " * 20}</content>
+<author><name>user{i}</name></author>
+</entry>"""
+        for i in range(n)
+    )
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Qiita</title>{entries}</feed>""".encode()
+
+
+def parse_with_feedparser(data: bytes) -> list[tuple[str, str, str]]:
+    return [(e.get("title"), e.get("link"), e.get("published")) for e in feedparser.parse(data).entries]
+
+
+def parse_with_feed_parser(data: bytes, limit: int | None = None) -> list["FeedEntry"]:
+    return list(islice(feed_parser.FeedParser.iter_entries(data), limit))
+
+
+CASES: dict[str, Callable[[bytes], object]] = {
+    "feedparser": parse_with_feedparser,
+    "FeedParser (all)": parse_with_feed_parser,
+    "FeedParser (first 20)": partial(parse_with_feed_parser, limit=20),
+}
+
+
+def max_rss_mib() -> float:
+    """
+    Returns the peak resident set size of this process in MiB.
+    """
+    status = pathlib.Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return max_rss / 1024 / 1024 if sys.platform == "darwin" else max_rss / 1024
+
+
+def measure(func: Callable[[], object], repeat: int) -> tuple[float, float]:
+    """
+    Returns the best wall time in milliseconds and the growth of the peak RSS in MiB during the first call.
+    Must run in a fresh process, since the peak RSS never goes down.
+    """
+    baseline = max_rss_mib()
+    func()
+    peak = max_rss_mib() - baseline
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, peak
+
+
+def run_case(path: str, label: str, repeat: int) -> None:
+    """
+    Measures one case on the feed stored at `path` and prints the wall time and the peak RSS growth.
+    """
+    data = pathlib.Path(path).read_bytes()
+    ms, mib = measure(partial(CASES[label], data), repeat)
+    print(f"{ms} {mib}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--case", nargs=2, metavar=("PATH", "LABEL"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.case is not None:
+        path, label = args.case
+        run_case(path, label, args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, data in [("RSS 2.0", make_rss(args.entries)), ("Atom", make_atom(args.entries))]:
+            print(f"{name}: {args.entries} entries, {len(data) / 1024 / 1024:.1f} MiB")
+            # The feed is read from a file so that building it does not raise the peak RSS of the measured process
+            path = pathlib.Path(tmp_dir) / "feed.xml"
+            path.write_bytes(data)
+            for label in CASES:
+                res = subprocess.run(
+                    [sys.executable, __file__, "--case", str(path), label, "--repeat", str(args.repeat)],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                ms, mib = map(float, res.stdout.split())
+                print(f"  {label:<22} {ms:9.1f} ms  peak RSS +{mib:7.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
+import argparse
 import asyncio
 import tomllib
+from datetime import datetime
 from pathlib import Path
 from typing import cast
 
 from tech_feeds_digest import TechFeedsDigest
+from tech_feeds_digest.profiler import Profiler
 from tech_feeds_digest.types import AppConfig
 
 THIS_DIR = Path(__file__).parent
@@ -25,13 +28,49 @@ def get_config(path: Path) -> AppConfig:
         return cast(AppConfig, conf)
 
 
+def parse_args() -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Summarize new Zenn and Qiita articles and post them to Discord.")
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Run as one of several workers sharing the work queue configured in [distributed].",
+    )
+    parser.add_argument("--worker-id", help="Unique ID of this worker. Defaults to the host name and process ID.")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Sample each stage of the run (not in worker mode) and write <stage>.collapsed files for flame graphs.",
+    )
+    parser.add_argument("--profile-dir", type=Path, help="Directory of the profile files. Defaults to profiles/<timestamp>.")
+    parser.add_argument("--profile-interval", type=float, default=0.005, help="Seconds between two samples. Defaults to 0.005.")
+    parser.add_argument(
+        "--profile-deterministic",
+        action="store_true",
+        help="Also profile each stage with cProfile and write <stage>.prof files. Much slower.",
+    )
+    return parser.parse_args()
+
+
 async def main():
     """
     Main asynchronous function to initialize and run the TechFeedsDigest process.
     """
+    args = parse_args()
     config = get_config(CONFIG_PATH)
-    client = TechFeedsDigest(config)
-    await client.run()
+    if args.worker:
+        await TechFeedsDigest(config).run_worker(args.worker_id)
+    elif args.profile:
+        profile_dir = args.profile_dir or THIS_DIR / "profiles" / datetime.now().strftime("%Y%m%d-%H%M%S")
+        with Profiler(profile_dir, args.profile_interval, args.profile_deterministic) as profiler:
+            await TechFeedsDigest(config, profiler).run()
+    else:
+        await TechFeedsDigest(config).run()
 
 
 if __name__ == "__main__":
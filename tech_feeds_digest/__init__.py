@@ -1,28 +1,72 @@
+import asyncio
+import os
+import socket
 import sys
+import time
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import AbstractContextManager, nullcontext, suppress
+from datetime import datetime, timedelta
+from itertools import islice
 from logging import getLogger
+from typing import TypeVar
 
 import polars as pl
+import pytz
 
+from .api_client import ApiClient
+from .budget import Budget
+from .cluster import Clusterer
+from .deadline import Deadline
 from .discord import Discord
+from .image_validator import ImageValidator
+from .lock import RunLock
+from .profiler import Profiler
 from .qiita_feed import QiitaFeed
+from .ranker import Ranker
+from .scheduler import PollScheduler
 from .scraper import Scraper
+from .state import State
 from .summarizer import Summarizer
-from .types import AppConfig, FeedData, ScrapedData, SummarizedData
+from .types import AppConfig, FeedData, ScrapedData, SummarizedData, expected_schema
+from .work_queue import Heartbeat, SQLiteWorkQueue
 from .zenn_feed import ZennFeed
 
+T = TypeVar("T", ScrapedData, list[ScrapedData])
+
 
 class TechFeedsDigest:
     """
     Main class for orchestrating the fetching, processing, and notification of tech feed data.
     """
 
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, profiler: Profiler | None = None):
         """
         Initializes the main class with the provided configuration.
         :param config: Application configuration.
+        :param profiler: Profiler that each stage of `run` is attributed to.
         """
         self.config = config
         self.logger = getLogger(__name__)
+        self.state = State.load(config.get("state_path"))
+        self.profiler = profiler
+
+    def _stage(self, name: str) -> AbstractContextManager[None]:
+        """
+        Returns the context in which a stage of `run` is executed.
+        :param name: Name of the stage.
+        :return: The profiler stage, or a no-op context when not profiling.
+        """
+        return self.profiler.stage(name) if self.profiler is not None else nullcontext()
+
+    def _collect_in_worker(self, summarized_data_iter: Iterator[SummarizedData]) -> list[SummarizedData]:
+        """
+        Collects the summaries in a worker thread, sampled and profiled as part of the active stage.
+        :param summarized_data_iter: Summaries to collect.
+        :return: The collected summaries.
+        """
+        with self.profiler.worker() if self.profiler is not None else nullcontext():
+            return list(summarized_data_iter)
 
     def _drop_duplicates_by_title(self, df: pl.DataFrame) -> pl.DataFrame:
         """
@@ -35,15 +79,54 @@ class TechFeedsDigest:
         df = df.sort(["title", "published"], descending=[False, True])
         return df.unique(subset=["title"], keep="first")
 
-    def _get_feed_data(self):
+    def _create_executor(self) -> Executor | None:
+        """
+        Creates the executor for CPU-bound parsing when `parse_workers` is configured.
+        Threads are used on free-threaded Python builds, worker processes otherwise.
+        :return: Executor, or None to parse in the calling thread.
+        """
+        workers = self.config.get("parse_workers")
+        if not workers:
+            return None
+        is_gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)
+        if not is_gil_enabled():
+            return ThreadPoolExecutor(max_workers=workers)
+        return ProcessPoolExecutor(max_workers=workers)
+
+    def _get_feed_data(self, executor: Executor | None = None, deadline: Deadline | None = None, api: ApiClient | None = None):
         """
-        Retrieves and combines feed data from Zenn and Qiita, removing duplicates.
+        Retrieves and combines feed data from Zenn and Qiita and the entries deferred
+        by previous runs, removing duplicates.
+        :param executor: Executor to fetch and parse the feeds on.
+        :param deadline: Feeds not read by this deadline are skipped until the next run.
+        :param api: Lists the articles through the APIs instead of the feeds when given.
         :return: DataFrame with combined feed data.
         """
         lookback_hours = self.config["lookback_hours"]
-        zf_df = ZennFeed.run(lookback_hours, self.config["zenn"])
-        qf_df = QiitaFeed.run(lookback_hours, self.config["qiita"])
-        combined_df = pl.concat([zf_df, qf_df])
+        timeout = self._request_timeout()
+        zenn_config, qiita_config = self.config["zenn"], self.config["qiita"]
+        scheduler = PollScheduler(self.config["polling"], self.state) if "polling" in self.config else None
+        now = datetime.now(pytz.timezone("Asia/Tokyo"))
+        lookbacks: dict[str, float] | None = None
+        counts: dict[str, int] = {}
+        if scheduler is not None:
+            urls = zenn_config["feeds"] + qiita_config["feeds"]
+            lookbacks = scheduler.plan(urls, lookback_hours, now)
+            self.logger.info("Polling %s of %s feeds", len(lookbacks), len(urls))
+            zenn_config = {**zenn_config, "feeds": [url for url in zenn_config["feeds"] if url in lookbacks]}
+            qiita_config = {**qiita_config, "feeds": [url for url in qiita_config["feeds"] if url in lookbacks]}
+        if api is not None:
+            zf_df = api.run(lookback_hours, zenn_config, qiita_config, self.state, deadline, lookbacks, counts)
+            qf_df = pl.DataFrame([], schema=expected_schema)
+        else:
+            zf_df = ZennFeed.run(lookback_hours, zenn_config, self.state, executor, deadline, timeout, lookbacks, counts)
+            qf_df = QiitaFeed.run(lookback_hours, qiita_config, self.state, executor, deadline, timeout, lookbacks, counts)
+        if scheduler is not None and lookbacks is not None:
+            scheduler.record(counts, lookbacks, now)
+        max_defer_hours = self.config.get("budget", {}).get("max_defer_hours", 24.0)
+        not_before = datetime.now(pytz.timezone("Asia/Tokyo")) - timedelta(hours=max_defer_hours)
+        deferred_df = pl.DataFrame(self.state.pop_deferred(not_before), schema=expected_schema)
+        combined_df = pl.concat([zf_df, qf_df, deferred_df])
         fil_dif = self._drop_duplicates_by_title(combined_df)
         self.logger.info("Total entries: %s", fil_dif.shape[0])
         return fil_dif
@@ -57,22 +140,313 @@ class TechFeedsDigest:
             self.logger.info("No new entries found. Exiting...")
             sys.exit(0)
 
+    def _request_timeout(self) -> float:
+        """
+        Returns the timeout of each HTTP request made while scraping.
+        :return: Timeout in seconds.
+        """
+        return self.config.get("deadline", {}).get("request_timeout", Scraper.TIMEOUT)
+
+    def _until(self, feed_data_list: list[FeedData], deadline: Deadline, deferred: list[FeedData]) -> Iterator[FeedData]:
+        """
+        Lazily yields entries until the deadline expires. The remaining entries are appended to `deferred`.
+        :param feed_data_list: Entries to yield.
+        :param deadline: Deadline of the stage.
+        :param deferred: Receives the entries that were not yielded.
+        :return: Iterator of entries.
+        """
+        for i, feed_data in enumerate(feed_data_list):
+            if deadline.expired():
+                deferred.extend(feed_data_list[i:])
+                return
+            yield feed_data
+
+    def _iter_chunks(self, df: pl.DataFrame, ranker: Ranker | None = None) -> Iterator[list[FeedData]]:
+        """
+        Splits feed data into chunks of at most `max_in_flight` entries.
+        :param df: DataFrame to split.
+        :param ranker: Ranks every entry before splitting, so the chunks come highest-ranked first.
+        :return: Iterator of feed data chunks.
+        """
+        max_in_flight = self.config.get("max_in_flight") or df.shape[0]
+        rows: Iterator[FeedData] = df.iter_rows(named=True)  # type:ignore
+        if ranker is not None:
+            rows = iter(ranker.rank_entries(list(rows)))
+        while chunk := list(islice(rows, max_in_flight)):
+            yield chunk
+
+    @staticmethod
+    def _announce_images(taken: Iterator[T], image_urls: asyncio.Queue[str | None]) -> Iterator[T]:
+        """
+        Passes through the articles or clusters taken by the budget and puts their image URLs on a queue
+        of the running event loop, followed by None once they are exhausted. The returned iterator may be
+        consumed from another thread.
+        :param taken: Articles or clusters of articles taken by the budget.
+        :param image_urls: Queue that receives the image URLs.
+        :return: The same articles or clusters.
+        """
+        loop = asyncio.get_running_loop()
+
+        def announce() -> Iterator[T]:
+            try:
+                for item in taken:
+                    for scraped_data in item if isinstance(item, list) else [item]:
+                        if scraped_data["image_url"]:
+                            loop.call_soon_threadsafe(image_urls.put_nowait, scraped_data["image_url"])
+                    yield item
+            finally:
+                # A generator abandoned by a failed run may be finalized after the loop has closed
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(image_urls.put_nowait, None)
+
+        return announce()
+
+    @staticmethod
+    async def _drain(image_urls: asyncio.Queue[str | None]) -> AsyncIterator[str]:
+        """
+        Yields the image URLs put on the queue until None is received.
+        :param image_urls: Queue filled by `_announce_images`.
+        :return: Async iterator of the image URLs.
+        """
+        while (url := await image_urls.get()) is not None:
+            yield url
+
     async def run(self):
         """
         Main execution method: fetches, processes, summarizes, and sends notifications.
+        Articles are processed in bounded chunks, summarized highest-ranked first within
+        the run budget, and each article body is released as soon as its summary is produced.
+        Articles that do not fit in the budget are deferred to the next run.
+        With `deadline` configured, each stage stops starting new work once its deadline expires and the
+        unprocessed articles are deferred as well, as are articles whose download or LLM request fails.
+        The state is saved even if the run fails. With `lock_path` configured, the run exits immediately
+        if another run still holds the lock. With `api` configured, the articles are listed and fetched
+        through the Zenn and Qiita APIs instead of the feeds and article pages.
         """
+        lock = RunLock(self.config["lock_path"]) if "lock_path" in self.config else None
+        if lock is not None and not lock.acquire():
+            self.logger.warning("Another run is still in progress. Exiting...")
+            return
+        # Another run may have saved the state since it was loaded
+        self.state = State.load(self.config.get("state_path"))
         self.logger.info("Starting TechFeedsDigest")
-        feed_df = self._get_feed_data()
+        executor = self._create_executor()
+        api = ApiClient(self.config["api"], self._request_timeout()) if "api" in self.config else None
+        try:
+            await self._run(executor, api)
+        finally:
+            # Keep the entries deferred so far even if the run fails; high-water marks only move on commit
+            self.state.save()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            if api is not None:
+                api.close()
+            if lock is not None:
+                lock.release()
+        self.logger.info("TechFeedsDigest finished!")
+
+    async def _run(self, executor: Executor | None, api: ApiClient | None = None) -> None:
+        """
+        Runs every stage of the digest.
+        :param executor: Executor for CPU-bound parsing, or None to parse in the calling thread.
+        :param api: Lists and fetches the articles through the APIs instead of the feeds and pages when given.
+        """
+        deadline_config = self.config.get("deadline", {})
+        deadline = Deadline(deadline_config.get("total_seconds"))
+        timeout = self._request_timeout()
+        with self._stage("feeds"):
+            feed_df = self._get_feed_data(executor, deadline.child(deadline_config.get("feeds_seconds")), api)
+        if feed_df.is_empty():
+            self.state.commit()
         self._check_no_new_entry(feed_df)
-        self.logger.info("Scraping data...")
-        feed_data_list: list[FeedData] = feed_df.to_dicts()
-        scraped_data_list: list[ScrapedData] = Scraper.run(feed_data_list)
-        self.logger.info("Summarizing data...")
-        s = Summarizer(self.config["llm"])
-        summarized_data_list: list[SummarizedData] = s.run(
-            scraped_data_list=scraped_data_list,  # type:ignore
+        process_deadline = deadline.child(deadline_config.get("process_seconds"))
+        budget = Budget(self.config.get("budget", {}), deadline=process_deadline)
+        s = Summarizer(self.config["llm"], deadline_config.get("request_timeout"), budget)
+        d = Discord(self.config["discord"], deadline_config.get("request_timeout"))
+        ranker = Ranker(self.config.get("ranking", {}))
+        cluster_config = self.config.get("cluster")
+        clusterer = Clusterer(cluster_config) if cluster_config is not None else None
+        combine_clusters = cluster_config is not None and cluster_config.get("combined_post", False)
+        max_pending = 2 * (self.config.get("parse_workers") or 1)
+        image_config = self.config.get("images")
+        image_validator = ImageValidator(image_config, self.state, timeout) if image_config is not None else None
+        for feed_data_chunk in self._iter_chunks(feed_df, ranker):
+            if budget.is_exhausted():
+                self.logger.info("Budget reached. Deferring %s entries to the next run.", len(feed_data_chunk))
+                self.state.defer(feed_data_chunk)
+                continue
+            self.logger.info("Scraping %s entries...", len(feed_data_chunk))
+            unscraped: list[FeedData] = []
+            feed_data_iter = self._until(feed_data_chunk, process_deadline, unscraped)
+            with self._stage("scrape"):
+                if api is not None:
+                    scraped_data_list = list(api.iter_run(feed_data_iter, unscraped))
+                else:
+                    scraped_data_list = list(Scraper.iter_run(feed_data_iter, executor, max_pending, timeout, unscraped))
+            with self._stage("rank"):
+                scraped_data_list = ranker.rank(scraped_data_list)
+            if unscraped:
+                self.logger.info("Deferring %s unscraped entries to the next run.", len(unscraped))
+            self.state.defer(unscraped)
+            self.logger.info("Summarizing data...")
+            deferred: list[ScrapedData] = []
+            failed: list[ScrapedData] = []
+            image_urls: asyncio.Queue[str | None] = asyncio.Queue()
+            if clusterer is not None:
+                with self._stage("cluster"):
+                    clusters = clusterer.cluster(scraped_data_list)
+                taken_clusters = budget.take_clusters(clusters, deferred, s.model_for, self.config["llm"]["openai_model"])
+                if image_validator is not None:
+                    taken_clusters = self._announce_images(taken_clusters, image_urls)
+                summarized_data_iter = s.iter_run_clusters(taken_clusters, release_content=True, failed=failed)
+            else:
+                taken = budget.take(scraped_data_list, deferred, s.model_for)
+                if image_validator is not None:
+                    taken = self._announce_images(taken, image_urls)
+                summarized_data_iter = s.iter_run(taken, release_content=True, failed=failed)
+            with self._stage("summarize"):
+                if image_validator is not None:
+                    # Check the images of the taken articles on the event loop while they are summarized in a worker thread
+                    image_task = asyncio.create_task(image_validator.validate_all(self._drain(image_urls)))
+                    try:
+                        summarized_data_list: list[SummarizedData] = await asyncio.to_thread(
+                            self._collect_in_worker, summarized_data_iter
+                        )
+                        image_validator.apply(summarized_data_list, await image_task)
+                    finally:
+                        if not image_task.done():
+                            image_task.cancel()
+                            with suppress(asyncio.CancelledError):
+                                await image_task
+                else:
+                    summarized_data_list = list(summarized_data_iter)
+            if deferred:
+                self.logger.info("Budget reached. Deferring %s entries to the next run.", len(deferred))
+            self.state.defer(deferred)  # type:ignore
+            if failed:
+                self.logger.info("Deferring %s entries that failed to be summarized to the next run.", len(failed))
+            self.state.defer(failed)  # type:ignore
+            # Release the article bodies of this chunk before delivery
+            del scraped_data_list, deferred, failed
+            self.logger.info("Sending message...")
+            with self._stage("deliver"):
+                unsent = await d.send_messages(summarized_data_list, combine_clusters, deadline)
+            if unsent:
+                self.logger.info("Deferring %s unsent entries to the next run.", len(unsent))
+            self.state.defer(unsent)  # type:ignore
+        # Every entry has been delivered or deferred, so the feeds can move past them
+        self.state.commit()
+
+    async def run_worker(self, worker_id: str | None = None) -> None:
+        """
+        Runs as one of several workers sharing the work queue configured in `distributed`.
+        Feeds of the current cycle and the articles found in them are claimed with leases,
+        so each feed is polled by one worker and each article is summarized and posted once.
+        :param worker_id: Unique ID of this worker. Defaults to the host name and process ID.
+        """
+        distributed = self.config.get("distributed")
+        if distributed is None or "queue_path" not in distributed:
+            self.logger.error("Worker mode requires a [distributed] section with queue_path in the config.")
+            sys.exit(1)
+        queue = SQLiteWorkQueue(
+            distributed["queue_path"],
+            lease_seconds=distributed.get("lease_seconds", 300.0),
+            max_attempts=distributed.get("max_attempts", 3),
         )
-        self.logger.info("Sending message...")
-        d = Discord(self.config["discord"])
-        await d.send_messages(summarized_data_list)
-        self.logger.info("TechFeedsDigest finished!")
+        owner = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.logger.info("Starting TechFeedsDigest worker %s", owner)
+        deadline_config = self.config.get("deadline", {})
+        deadline = Deadline(deadline_config.get("total_seconds"))
+        self._enqueue_feeds(queue)
+        self._process_feed_items(queue, owner, deadline.child(deadline_config.get("feeds_seconds")))
+        await self._process_article_items(queue, owner, deadline.child(deadline_config.get("process_seconds")), deadline)
+        self.logger.info("TechFeedsDigest worker %s finished!", owner)
+
+    def _enqueue_feeds(self, queue: SQLiteWorkQueue) -> None:
+        """
+        Adds the configured feeds for the current cycle. Every worker does this; duplicates are ignored.
+        Items that finished more than `retention_cycles` cycles ago are pruned first. Articles are kept
+        at least as long as the feeds can return them, so a pruned article is never posted again.
+        :param queue: The work queue.
+        """
+        distributed = self.config["distributed"]
+        cycle_seconds = distributed.get("cycle_seconds", 3600)
+        # Zenn entries are read up to 24 hours past the lookback period
+        min_age = (self.config["lookback_hours"] + 24) * 3600
+        pruned = queue.prune(max(distributed.get("retention_cycles", 24) * cycle_seconds, min_age))
+        if pruned:
+            self.logger.info("Pruned %s finished items from the work queue.", pruned)
+        cycle = int(time.time() // cycle_seconds)
+        for source in ("zenn", "qiita"):
+            for url in self.config[source]["feeds"]:  # type:ignore
+                queue.enqueue("feed", f"{cycle}:{url}", {"source": source, "url": url})
+
+    def _process_feed_items(self, queue: SQLiteWorkQueue, owner: str, deadline: Deadline | None = None) -> None:
+        """
+        Claims feeds one at a time and adds the entries found in them as article items.
+        :param queue: The work queue.
+        :param owner: ID of this worker.
+        :param deadline: No further feed is claimed once this deadline expires.
+        """
+        lookback_hours = self.config["lookback_hours"]
+        timeout = self._request_timeout()
+        while not (deadline is not None and deadline.expired()) and (items := queue.claim("feed", owner)):
+            item = items[0]
+            feed_class = ZennFeed if item["payload"]["source"] == "zenn" else QiitaFeed
+            counts: dict[str, int] = {}
+            df = feed_class.run(lookback_hours, {"feeds": [item["payload"]["url"]]}, timeout=timeout, counts=counts)
+            # The feed failed to be fetched or parsed
+            if item["payload"]["url"] not in counts:
+                queue.release(item["id"], owner)
+                continue
+            for feed_data in df.iter_rows(named=True):
+                queue.enqueue("article", feed_data["link"], {**feed_data, "published": feed_data["published"].isoformat()})
+            queue.complete(item["id"], owner)
+
+    async def _process_article_items(
+        self,
+        queue: SQLiteWorkQueue,
+        owner: str,
+        process_deadline: Deadline | None = None,
+        deadline: Deadline | None = None,
+    ) -> None:
+        """
+        Claims articles in batches of `max_in_flight`, then scrapes, summarizes and posts them.
+        Articles that could not be summarized or posted are released for a retry.
+        :param queue: The work queue.
+        :param owner: ID of this worker.
+        :param process_deadline: No further batch is claimed once this deadline expires.
+        :param deadline: No further article is posted once this deadline expires.
+        """
+        request_timeout = self.config.get("deadline", {}).get("request_timeout")
+        s = Summarizer(self.config["llm"], request_timeout)
+        d = Discord(self.config["discord"], request_timeout)
+        timeout = self._request_timeout()
+        image_config = self.config.get("images")
+        image_validator = ImageValidator(image_config, self.state, timeout) if image_config is not None else None
+        batch_size = self.config.get("max_in_flight") or 10
+        while not (process_deadline is not None and process_deadline.expired()) and (
+            items := queue.claim("article", owner, batch_size)
+        ):
+            by_link = {item["key"]: item for item in items}
+            feed_data_list: list[FeedData] = [
+                {**item["payload"], "published": datetime.fromisoformat(item["payload"]["published"])}  # type:ignore
+                for item in items
+            ]
+            with Heartbeat(queue, owner, [item["id"] for item in items]):
+                self.logger.info("Scraping and summarizing %s entries...", len(items))
+                summarized_data_list = list(s.iter_run(Scraper.iter_run(feed_data_list, timeout=timeout), release_content=True))
+                if image_validator is not None:
+                    image_results = await image_validator.validate_all(m["image_url"] for m in summarized_data_list)
+                    image_validator.apply(summarized_data_list, image_results)
+                for message in summarized_data_list:
+                    if deadline is not None and deadline.expired():
+                        break
+                    item = by_link.pop(message["link"])
+                    if not queue.start_delivery(item["id"], owner):
+                        self.logger.warning("Lease lost, skipping delivery: %s", message["link"])
+                        continue
+                    await d.send_messages([message])
+                    queue.complete(item["id"], owner)
+            for item in by_link.values():
+                queue.release(item["id"], owner)
@@ -0,0 +1,371 @@
+import re
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta
+from logging import getLogger
+from typing import Any, TypeVar
+
+import httpx
+import polars as pl
+import pytz
+from lxml import html as lxml_html
+
+from .deadline import Deadline
+from .scraper import Scraper
+from .state import State
+from .types import ApiConfig, ContentData, FeedData, QiitaConfig, ScrapedData, ZennConfig, expected_schema
+
+logger = getLogger(__name__)
+
+QIITA_TAG_FEED = re.compile(r"^https?://qiita\.com/tags/([^/]+)/feed/?$")
+ZENN_TOPIC_FEED = re.compile(r"^https?://zenn\.dev/topics/([^/]+)/feed/?$")
+ZENN_USER_FEED = re.compile(r"^https?://zenn\.dev/([^/]+)/feed/?$")
+ZENN_FEED = re.compile(r"^https?://zenn\.dev/feed/?$")
+ZENN_URL = "https://zenn.dev"
+
+R = TypeVar("R", bound=FeedData)
+
+
+class ApiClient:
+    """
+    Reads Zenn and Qiita articles through their JSON APIs instead of the RSS feeds and article pages.
+    Listings are paginated by Qiita tag or by Zenn topic or user, and each configured feed URL is mapped to
+    the equivalent API query. Qiita listings already carry the body of each item, so the bodies of the first
+    `max_kept_bodies` items listed in a run are kept until they are scraped. The body of any other article,
+    such as a Zenn article or an entry deferred by a previous run, is fetched with one JSON call when it is scraped.
+    """
+
+    def __init__(self, config: ApiConfig, timeout: float = Scraper.TIMEOUT):
+        """
+        Initializes the client with the given configuration.
+
+        Args:
+            config (ApiConfig): API configuration.
+            timeout (float): Timeout of each request in seconds.
+        """
+        self.config = config
+        self.qiita_base_url = config.get("qiita_base_url", "https://qiita.com/api/v2").rstrip("/")
+        self.zenn_base_url = config.get("zenn_base_url", "https://zenn.dev/api").rstrip("/")
+        self.per_page = config.get("per_page", 100)
+        self.max_pages = config.get("max_pages", 10)
+        self.max_kept_bodies = config.get("max_kept_bodies", 100)
+        self.contents: dict[str, ContentData] = {}
+        self.client = httpx.Client(timeout=timeout, follow_redirects=True)
+
+    def close(self) -> None:
+        """
+        Closes the underlying HTTP connections and drops the kept bodies.
+        """
+        self.contents.clear()
+        self.client.close()
+
+    def _get_json(self, url: str, params: dict[str, Any] | None = None) -> Any:
+        """
+        Sends a GET request and decodes the JSON response.
+
+        Args:
+            url (str): The URL to fetch.
+            params (dict[str, Any] | None): Query parameters.
+
+        Returns:
+            Any: The decoded response.
+        """
+        headers: dict[str, str] = {}
+        token = self.config.get("qiita_token")
+        if token and url.startswith(self.qiita_base_url):
+            headers["Authorization"] = f"Bearer {token}"
+        res = self.client.get(url, params=params, headers=headers)
+        res.raise_for_status()
+        return res.json()
+
+    @staticmethod
+    def _to_jst(dt_str: str) -> datetime:
+        """
+        Converts an ISO 8601 timestamp to a datetime in JST.
+
+        Args:
+            dt_str (str): Timestamp with a UTC offset.
+
+        Returns:
+            datetime: Timezone-aware datetime in JST.
+        """
+        return datetime.fromisoformat(dt_str).astimezone(pytz.timezone("Asia/Tokyo"))
+
+    @staticmethod
+    def _zenn_params(feed_url: str) -> dict[str, str] | None:
+        """
+        Maps a Zenn feed URL to the query of the article listing.
+
+        Args:
+            feed_url (str): The feed URL.
+
+        Returns:
+            dict[str, str] | None: Query parameters, or None if the feed has no API equivalent.
+        """
+        if ZENN_FEED.match(feed_url):
+            return {}
+        if m := ZENN_TOPIC_FEED.match(feed_url):
+            return {"topicname": m.group(1)}
+        if m := ZENN_USER_FEED.match(feed_url):
+            return {"username": m.group(1)}
+        return None
+
+    def _qiita_record(self, item: dict[str, Any]) -> ScrapedData:
+        """
+        Converts a Qiita item into a scraped record. The API has no og:image, so the image is left empty.
+
+        Args:
+            item (dict[str, Any]): Item returned by the Qiita API.
+
+        Returns:
+            ScrapedData: The scraped record.
+        """
+        return {
+            "title": item["title"],
+            "link": item["url"],
+            "published": self._to_jst(item["created_at"]),
+            "source": "qiita",
+            "tags": [tag["name"] for tag in item["tags"]],
+            "image_url": None,
+            "content": item["body"],
+            "author": item["user"]["id"],
+        }
+
+    @staticmethod
+    def _qiita_content(record: ScrapedData) -> ContentData:
+        """
+        Extracts the content data of a scraped Qiita record.
+
+        Args:
+            record (ScrapedData): The scraped record.
+
+        Returns:
+            ContentData: Content data of the item.
+        """
+        return {
+            "link": record["link"],
+            "tags": record["tags"],
+            "image_url": record["image_url"],
+            "content": record["content"],
+            "author": record["author"],
+        }
+
+    def _iter_qiita_items(self, tag: str, cutoff: datetime) -> Iterator[dict[str, Any]]:
+        """
+        Lazily pages through the items of a Qiita tag, newest first.
+
+        Args:
+            tag (str): The tag.
+            cutoff (datetime): Only items created on or after this day are requested.
+
+        Yields:
+            dict[str, Any]: Items returned by the Qiita API.
+        """
+        query = f"tag:{tag} created:>={cutoff.date().isoformat()}"
+        for page in range(1, self.max_pages + 1):
+            items = self._get_json(f"{self.qiita_base_url}/items", {"page": page, "per_page": self.per_page, "query": query})
+            yield from items
+            if len(items) < self.per_page:
+                return
+
+    def _iter_zenn_articles(self, params: dict[str, str]) -> Iterator[dict[str, Any]]:
+        """
+        Lazily pages through a Zenn article listing, newest first.
+
+        Args:
+            params (dict[str, str]): Query of the listing.
+
+        Yields:
+            dict[str, Any]: Articles returned by the Zenn API, without their body.
+        """
+        page: int | None = 1
+        for _ in range(self.max_pages):
+            if page is None:
+                return
+            res = self._get_json(f"{self.zenn_base_url}/articles", {**params, "order": "latest", "page": page})
+            yield from res["articles"]
+            page = res.get("next_page")
+
+    @staticmethod
+    def _take_new(records: Iterable[R], url: str, cutoff: datetime, state: State | None) -> Iterator[R]:
+        """
+        Lazily yields the records within the lookback period that were not seen in a previous run,
+        and moves the high-water mark of the feed to the newest one.
+
+        Args:
+            records (Iterable[R]): Records, newest first.
+            url (str): The feed URL the high-water mark is kept for.
+            cutoff (datetime): Records published at or before this time are outside the lookback period.
+            state (State | None): State holding the high-water mark of each feed.
+
+        Yields:
+            R: New records.
+        """
+        seen_published, seen_link = state.get_high_water_mark(url) if state is not None else (None, None)
+        newest: R | None = None
+        for record in records:
+            if seen_link is not None and record["link"] == seen_link:
+                break
+            if record["published"] <= cutoff:
+                break
+            if seen_published is not None and record["published"] < seen_published:
+                break
+            newest = newest or record
+            yield record
+        if state is not None and newest is not None:
+            state.set_high_water_mark(url, newest["published"], newest["link"])
+
+    def _list_qiita(self, url: str, cutoff: datetime, state: State | None, data: dict[str, FeedData]) -> int:
+        """
+        Lists the new items of a Qiita tag feed and keeps their bodies while fewer than `max_kept_bodies` are kept.
+
+        Args:
+            url (str): The feed URL.
+            cutoff (datetime): Start of the lookback period.
+            state (State | None): State holding the high-water mark of each feed.
+            data (dict[str, FeedData]): Receives the listed items, by link.
+
+        Returns:
+            int: Number of new items.
+        """
+        m = QIITA_TAG_FEED.match(url)
+        if m is None:
+            logger.warning("No API equivalent for feed: %s", url)
+            return 0
+        count = 0
+        records = (self._qiita_record(item) for item in self._iter_qiita_items(m.group(1), cutoff))
+        for record in self._take_new(records, url, cutoff, state):
+            link = record["link"]
+            data[link] = {"title": record["title"], "link": link, "published": record["published"], "source": "qiita"}
+            if len(self.contents) < self.max_kept_bodies:
+                self.contents[link] = self._qiita_content(record)
+            count += 1
+        return count
+
+    def _list_zenn(self, url: str, cutoff: datetime, state: State | None, data: dict[str, FeedData]) -> int:
+        """
+        Lists the new articles of a Zenn feed. Their content is fetched later, one article at a time.
+
+        Args:
+            url (str): The feed URL.
+            cutoff (datetime): Start of the lookback period.
+            state (State | None): State holding the high-water mark of each feed.
+            data (dict[str, FeedData]): Receives the listed articles, by link.
+
+        Returns:
+            int: Number of new articles.
+        """
+        params = self._zenn_params(url)
+        if params is None:
+            logger.warning("No API equivalent for feed: %s", url)
+            return 0
+        count = 0
+        records: Iterator[FeedData] = (
+            {
+                "title": article["title"],
+                "link": f"{ZENN_URL}{article['path']}",
+                "published": self._to_jst(article["published_at"]),
+                "source": "zenn",
+            }
+            for article in self._iter_zenn_articles(params)
+        )
+        for record in self._take_new(records, url, cutoff, state):
+            data[record["link"]] = record
+            count += 1
+        return count
+
+    def run(
+        self,
+        lookback_hours: int,
+        zenn_config: ZennConfig,
+        qiita_config: QiitaConfig,
+        state: State | None = None,
+        deadline: Deadline | None = None,
+        lookbacks: dict[str, float] | None = None,
+        counts: dict[str, int] | None = None,
+    ) -> pl.DataFrame:
+        """
+        Lists the articles of every configured feed within the lookback period.
+
+        Args:
+            lookback_hours (int): The number of hours to look back.
+            zenn_config (ZennConfig): Zenn feed URLs.
+            qiita_config (QiitaConfig): Qiita feed URLs. Only tag feeds are supported.
+            state (State | None): State holding the high-water mark of each feed.
+            deadline (Deadline | None): Feeds not read by this deadline are skipped and keep their high-water mark.
+            lookbacks (dict[str, float] | None): Lookback hours of each feed, overriding `lookback_hours`.
+            counts (dict[str, int] | None): Receives the number of new articles found on each feed that was read.
+
+        Returns:
+            pl.DataFrame: DataFrame of listed articles.
+        """
+        now = datetime.now(pytz.timezone("Asia/Tokyo"))
+        data: dict[str, FeedData] = {}
+        feeds = [("qiita", url) for url in qiita_config["feeds"]] + [("zenn", url) for url in zenn_config["feeds"]]
+        for i, (source, url) in enumerate(feeds):
+            if deadline is not None and deadline.expired():
+                logger.warning("Deadline reached. Skipping %d feeds.", len(feeds) - i)
+                break
+            hours = lookbacks.get(url, lookback_hours) if lookbacks is not None else lookback_hours
+            cutoff = now - timedelta(hours=hours)
+            try:
+                if source == "qiita":
+                    count = self._list_qiita(url, cutoff, state, data)
+                else:
+                    count = self._list_zenn(url, cutoff, state, data)
+                if counts is not None:
+                    counts[url] = count
+            except (httpx.HTTPError, KeyError, ValueError) as e:
+                logger.error("Failed to read feed %s from the API: %s", url, e)
+        return pl.DataFrame(list(data.values()), schema=expected_schema)
+
+    def get_data(self, feed_data: FeedData) -> ContentData:
+        """
+        Fetches the content of one article by the ID at the end of its link.
+
+        Args:
+            feed_data (FeedData): The feed data containing source and link.
+
+        Returns:
+            ContentData: Content data of the article.
+        """
+        link = feed_data["link"]
+        article_id = link.rstrip("/").rsplit("/", 1)[-1]
+        if feed_data["source"] == "qiita":
+            return self._qiita_content(self._qiita_record(self._get_json(f"{self.qiita_base_url}/items/{article_id}")))
+        article = self._get_json(f"{self.zenn_base_url}/articles/{article_id}")["article"]
+        body_html: str = article.get("body_html") or ""
+        return {
+            "link": link,
+            "tags": [topic["display_name"] for topic in article.get("topics", [])],
+            "image_url": article.get("og_image_url"),
+            "content": lxml_html.fragment_fromstring(body_html, create_parent="div").text_content().strip(),
+            "author": article["user"]["name"],
+        }
+
+    def iter_run(self, feed_data_iter: Iterable[FeedData], failed: list[FeedData] | None = None) -> Iterator[ScrapedData]:
+        """
+        Lazily yields the scraped record of each entry. Bodies kept from the listing are used and released;
+        any other content is fetched one article at a time.
+
+        Args:
+            feed_data_iter (Iterable[FeedData]): Feed data entries to process.
+            failed (list[FeedData] | None): Receives the entries whose request failed.
+
+        Yields:
+            ScrapedData: Scraped data record for each entry that could be fetched.
+        """
+        for feed_data in feed_data_iter:
+            content_data = self.contents.pop(feed_data["link"], None)
+            try:
+                if content_data is None:
+                    content_data = self.get_data(feed_data)
+            except httpx.HTTPError as e:
+                logger.error("Failed to fetch %s from the API: %r", feed_data["link"], e)
+                if failed is not None:
+                    failed.append(feed_data)
+                continue
+            except (KeyError, ValueError) as e:
+                logger.error("Failed to fetch %s from the API: %s", feed_data["link"], e)
+                continue
+            record: ScrapedData = {**feed_data, **content_data}
+            yield record
@@ -0,0 +1,165 @@
+import math
+import time
+from collections.abc import Callable, Iterable, Iterator
+
+from .deadline import Deadline
+from .types import BudgetConfig, ScrapedData
+
+
+class Budget:
+    """
+    Tracks the estimated tokens, cost and wall time spent on summarization within a run.
+    Tokens are priced at `model_costs` of the model that summarizes them, or at `cost_per_million_tokens`.
+    """
+
+    def __init__(self, config: BudgetConfig, clock: Callable[[], float] = time.monotonic, deadline: Deadline | None = None):
+        """
+        Initializes the Budget with the given configuration. Limits that are not configured are unbounded.
+
+        Args:
+            config (BudgetConfig): Per-run limits.
+            clock (Callable[[], float]): Monotonic clock in seconds.
+            deadline (Deadline | None): Deadline of the run. The budget is exhausted once it expires.
+        """
+        self.config = config
+        self.clock = clock
+        self.deadline = deadline
+        self.started_at = clock()
+        self.used_tokens = 0
+        self.used_cost = 0.0
+
+    def estimate_cost(self, tokens: int, model: str | None = None) -> float:
+        """
+        Estimates the cost of the given tokens.
+
+        Args:
+            tokens (int): Number of tokens.
+            model (str | None): Model that processes them. Priced at `cost_per_million_tokens` when not in `model_costs`.
+
+        Returns:
+            float: Estimated cost.
+        """
+        default_cost = self.config.get("cost_per_million_tokens", 0.0)
+        cost_per_million_tokens = self.config.get("model_costs", {}).get(model, default_cost) if model else default_cost
+        return tokens * cost_per_million_tokens / 1_000_000
+
+    def estimate_tokens(self, content: str) -> int:
+        """
+        Estimates the tokens needed to summarize the given content, including the output.
+
+        Args:
+            content (str): The article content.
+
+        Returns:
+            int: Estimated number of tokens.
+        """
+        chars_per_token = self.config.get("chars_per_token", 1.0)
+        return math.ceil(len(content) / chars_per_token) + self.config.get("output_tokens", 500)
+
+    def is_exhausted(self) -> bool:
+        """
+        Returns whether any of the limits has been reached.
+
+        Returns:
+            bool: True when no further article can be summarized.
+        """
+        if self.deadline is not None and self.deadline.expired():
+            return True
+        max_seconds = self.config.get("max_seconds")
+        if max_seconds is not None and self.clock() - self.started_at >= max_seconds:
+            return True
+        max_tokens = self.config.get("max_tokens")
+        if max_tokens is not None and self.used_tokens >= max_tokens:
+            return True
+        max_cost = self.config.get("max_cost")
+        return max_cost is not None and self.used_cost >= max_cost
+
+    def try_reserve(self, tokens: int, model: str | None = None) -> bool:
+        """
+        Reserves tokens for one summarization if it fits within every limit.
+
+        Args:
+            tokens (int): Estimated tokens of the summarization.
+            model (str | None): Model of the summarization.
+
+        Returns:
+            bool: True if the tokens were reserved.
+        """
+        if self.is_exhausted():
+            return False
+        max_tokens = self.config.get("max_tokens")
+        if max_tokens is not None and self.used_tokens + tokens > max_tokens:
+            return False
+        max_cost = self.config.get("max_cost")
+        cost = self.estimate_cost(tokens, model)
+        if max_cost is not None and self.used_cost + cost > max_cost:
+            return False
+        self.used_tokens += tokens
+        self.used_cost += cost
+        return True
+
+    def charge(self, tokens: int, model: str | None = None) -> None:
+        """
+        Records tokens spent beyond the reservation, such as a summary escalated to a larger model.
+
+        Args:
+            tokens (int): Estimated tokens.
+            model (str | None): Model that processed them.
+        """
+        self.used_tokens += tokens
+        self.used_cost += self.estimate_cost(tokens, model)
+
+    def take(
+        self,
+        scraped_data_iter: Iterable[ScrapedData],
+        deferred: list[ScrapedData],
+        route: Callable[[ScrapedData], str | None] | None = None,
+    ) -> Iterator[ScrapedData]:
+        """
+        Lazily yields articles that fit within the budget. Articles that do not fit are appended to `deferred`.
+        Because the wall-time limit is checked when each article is pulled, this should be consumed by the summarizer directly.
+
+        Args:
+            scraped_data_iter (Iterable[ScrapedData]): Articles, highest priority first.
+            deferred (list[ScrapedData]): Receives the articles that did not fit.
+            route (Callable[[ScrapedData], str | None] | None): Returns the model that will summarize an article,
+                or None if it is summarized without an LLM. Every article is priced at the default when not given.
+
+        Yields:
+            ScrapedData: Articles to summarize.
+        """
+        for scraped_data in scraped_data_iter:
+            model = route(scraped_data) if route is not None else None
+            if route is not None and model is None and not self.is_exhausted():
+                yield scraped_data
+                continue
+            if self.try_reserve(self.estimate_tokens(scraped_data["content"]), model):
+                yield scraped_data
+            else:
+                deferred.append(scraped_data)
+
+    def take_clusters(
+        self,
+        clusters: Iterable[list[ScrapedData]],
+        deferred: list[ScrapedData],
+        route: Callable[[ScrapedData], str | None] | None = None,
+        cluster_model: str | None = None,
+    ) -> Iterator[list[ScrapedData]]:
+        """
+        Lazily yields the part of each cluster that fits within the budget. Articles that do not fit are appended to `deferred`.
+        Single articles are priced with `route`; clusters of several articles are summarized together with `cluster_model`.
+
+        Args:
+            clusters (Iterable[list[ScrapedData]]): Clusters, highest priority first.
+            deferred (list[ScrapedData]): Receives the articles that did not fit.
+            route (Callable[[ScrapedData], str | None] | None): Returns the model that will summarize a single article.
+            cluster_model (str | None): Model that summarizes a cluster of several articles. Priced at the default when None.
+
+        Yields:
+            list[ScrapedData]: Non-empty clusters to summarize.
+        """
+        cluster_route = (lambda _: cluster_model) if cluster_model is not None else None
+        for cluster in clusters:
+            taken = list(self.take(cluster, deferred, route if len(cluster) == 1 else cluster_route))
+            if taken:
+                yield taken
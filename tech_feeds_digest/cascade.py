@@ -0,0 +1,102 @@
+import re
+from typing import Literal
+
+from .types import CascadeConfig
+
+Tier = Literal["extractive", "cheap", "strong"]
+
+FENCED_CODE_PATTERN = re.compile(r"```.*?```", re.DOTALL)
+SENTENCE_END_PATTERN = re.compile(r"(?<=[。．！？.!?])\s*")
+CODE_SYMBOLS = "{}();=<>[]"
+
+
+class Cascade:
+    """
+    Heuristics that decide which tier summarizes an article: a local extractive summary,
+    the cheap model, or the strong model.
+    """
+
+    def __init__(self, config: CascadeConfig):
+        """
+        Initializes the Cascade with the given configuration.
+
+        Args:
+            config (CascadeConfig): Cascade thresholds and the cheap model.
+        """
+        self.config = config
+
+    @staticmethod
+    def code_ratio(content: str) -> float:
+        """
+        Approximates the share of code in an article. Fenced code blocks are measured directly;
+        text without fences (such as Zenn body text) is estimated from the density of code symbols.
+
+        Args:
+            content (str): The article content.
+
+        Returns:
+            float: Share of code between 0 and 1.
+        """
+        if not content:
+            return 0.0
+        if "```" in content:
+            fenced = sum(len(block) for block in FENCED_CODE_PATTERN.findall(content))
+            return fenced / len(content)
+        symbols = sum(content.count(symbol) for symbol in CODE_SYMBOLS)
+        return min(symbols / len(content) * 10, 1.0)
+
+    def route(self, content: str, allow_extractive: bool = True) -> Tier:
+        """
+        Chooses the first tier to try for an article.
+
+        Args:
+            content (str): The article content.
+            allow_extractive (bool): Whether a local extractive summary is acceptable.
+
+        Returns:
+            Tier: The tier to try first.
+        """
+        if allow_extractive and len(content) <= self.config.get("extractive_max_chars", 0):
+            return "extractive"
+        if len(content) > self.config.get("cheap_max_chars", 6000):
+            return "strong"
+        if self.code_ratio(content) > self.config.get("max_code_ratio", 0.3):
+            return "strong"
+        return "cheap"
+
+    def should_escalate(self, texts: dict[str, str], languages: list[str], confidence: float | None) -> bool:
+        """
+        Decides whether the cheap model's output should be redone by the strong model.
+
+        Args:
+            texts (dict[str, str]): Summaries by language.
+            languages (list[str]): Requested languages.
+            confidence (float | None): Confidence reported by the cheap model.
+
+        Returns:
+            bool: True if the article should be escalated.
+        """
+        if any(language not in texts for language in languages):
+            return True
+        min_summary_chars = self.config.get("min_summary_chars", 40)
+        if any(len(texts[language].strip()) < min_summary_chars for language in languages):
+            return True
+        return confidence is not None and confidence < self.config.get("min_confidence", 0.7)
+
+    def extract(self, content: str) -> str:
+        """
+        Builds a local extractive summary from the leading sentences of an article.
+
+        Args:
+            content (str): The article content.
+
+        Returns:
+            str: The extractive summary.
+        """
+        max_chars = self.config.get("extractive_summary_chars", 200)
+        summary = ""
+        for sentence in SENTENCE_END_PATTERN.split(content.strip()):
+            if summary and len(summary) + len(sentence) > max_chars:
+                break
+            summary += sentence
+        return summary[:max_chars]
@@ -0,0 +1,116 @@
+import re
+
+import polars as pl
+
+from .types import ClusterConfig, ScrapedData
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class Clusterer:
+    """
+    Groups related articles by the cosine similarity of their TF-IDF vectors.
+    Character bigrams are used as terms so that Japanese text works without a tokenizer.
+    """
+
+    def __init__(self, config: ClusterConfig):
+        """
+        Initializes the Clusterer with the given configuration.
+
+        Args:
+            config (ClusterConfig): Clustering thresholds.
+        """
+        self.config = config
+
+    def _terms(self, scraped_data: ScrapedData) -> list[str]:
+        """
+        Extracts the terms of an article from its title, tags and the beginning of its content.
+
+        Args:
+            scraped_data (ScrapedData): The article.
+
+        Returns:
+            list[str]: Terms of the article.
+        """
+        max_chars = self.config.get("max_chars", 2000)
+        text = f"{scraped_data['title']} {scraped_data['title']} {scraped_data['content'][:max_chars]}"
+        text = WHITESPACE_PATTERN.sub("", text.casefold())
+        terms = [text[i : i + 2] for i in range(len(text) - 1)]
+        terms.extend(f"#{tag.casefold()}" for tag in scraped_data["tags"] for _ in range(self.config.get("tag_weight", 5)))
+        return terms
+
+    def similarities(self, scraped_data_list: list[ScrapedData]) -> pl.DataFrame:
+        """
+        Computes the cosine similarity of every pair of articles that share at least one term.
+
+        Args:
+            scraped_data_list (list[ScrapedData]): Articles to compare.
+
+        Returns:
+            pl.DataFrame: Columns `doc`, `doc_right` and `similarity`, sorted by similarity in descending order.
+        """
+        docs: list[int] = []
+        terms: list[str] = []
+        for i, scraped_data in enumerate(scraped_data_list):
+            doc_terms = self._terms(scraped_data)
+            docs.extend([i] * len(doc_terms))
+            terms.extend(doc_terms)
+        n = len(scraped_data_list)
+        weights = (
+            pl.DataFrame({"doc": docs, "term": terms}, schema={"doc": pl.Int64, "term": pl.Utf8})
+            .group_by("doc", "term")
+            .len("tf")
+            .with_columns(pl.len().over("term").alias("df"))
+            .with_columns(
+                ((1 + pl.col("tf").cast(pl.Float64).log()) * (((1 + n) / (1 + pl.col("df"))).log() + 1)).alias("weight")
+            )
+            .with_columns((pl.col("weight") / (pl.col("weight") ** 2).sum().over("doc").sqrt()).alias("weight"))
+            # Terms that appear in a single document cannot contribute to any pair
+            .filter(pl.col("df") > 1)
+            .select("doc", "term", "weight")
+        )
+        return (
+            weights.join(weights, on="term", suffix="_right")
+            .filter(pl.col("doc") < pl.col("doc_right"))
+            .group_by("doc", "doc_right")
+            .agg((pl.col("weight") * pl.col("weight_right")).sum().alias("similarity"))
+            .sort("similarity", "doc", "doc_right", descending=[True, False, False])
+        )
+
+    def cluster(self, scraped_data_list: list[ScrapedData]) -> list[list[ScrapedData]]:
+        """
+        Groups related articles. Pairs are merged from the most similar down to `similarity_threshold`,
+        without letting a cluster grow beyond `max_cluster_size`.
+
+        Args:
+            scraped_data_list (list[ScrapedData]): Articles to group, in priority order.
+
+        Returns:
+            list[list[ScrapedData]]: Clusters, including single-article ones, in the order of their first article.
+        """
+        n = len(scraped_data_list)
+        if n < 2:
+            return [[scraped_data] for scraped_data in scraped_data_list]
+        threshold = self.config.get("similarity_threshold", 0.3)
+        max_cluster_size = self.config.get("max_cluster_size", 5)
+        parent = list(range(n))
+        size = [1] * n
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        pairs = self.similarities(scraped_data_list).filter(pl.col("similarity") >= threshold)
+        for doc, doc_right, _ in pairs.iter_rows():
+            root, root_right = find(doc), find(doc_right)
+            if root == root_right or size[root] + size[root_right] > max_cluster_size:
+                continue
+            root, root_right = min(root, root_right), max(root, root_right)
+            parent[root_right] = root
+            size[root] += size[root_right]
+        clusters: dict[int, list[ScrapedData]] = {}
+        for i, scraped_data in enumerate(scraped_data_list):
+            clusters.setdefault(find(i), []).append(scraped_data)
+        return list(clusters.values())
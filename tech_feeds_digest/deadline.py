@@ -0,0 +1,54 @@
+import time
+from collections.abc import Callable
+
+
+class Deadline:
+    """
+    Point in time by which a run, or a stage of it, has to finish.
+    """
+
+    def __init__(self, seconds: float | None, clock: Callable[[], float] = time.monotonic):
+        """
+        Initializes the deadline.
+
+        Args:
+            seconds (float | None): Seconds from now. The deadline never expires when None.
+            clock (Callable[[], float]): Monotonic clock in seconds.
+        """
+        self.clock = clock
+        self.expires_at = clock() + seconds if seconds is not None else None
+
+    def child(self, seconds: float | None) -> "Deadline":
+        """
+        Creates a deadline for a stage that ends after `seconds` or with this deadline, whichever comes first.
+
+        Args:
+            seconds (float | None): Seconds from now allowed for the stage. Unlimited when None.
+
+        Returns:
+            Deadline: The stage deadline.
+        """
+        remaining = self.remaining()
+        if seconds is None or (remaining is not None and remaining < seconds):
+            seconds = remaining
+        return Deadline(seconds, self.clock)
+
+    def remaining(self) -> float | None:
+        """
+        Returns the seconds left, or None if the deadline never expires.
+
+        Returns:
+            float | None: Seconds left, never negative.
+        """
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - self.clock(), 0.0)
+
+    def expired(self) -> bool:
+        """
+        Returns whether the deadline has passed.
+
+        Returns:
+            bool: True if no time is left.
+        """
+        return self.remaining() == 0.0
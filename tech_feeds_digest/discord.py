@@ -1,8 +1,15 @@
+from logging import getLogger
+
 import aiohttp
 import discord
+from aiohttp.client import DEFAULT_TIMEOUT
 
+from .deadline import Deadline
+from .router import Router
 from .types import DiscordConfig, SummarizedData
 
+logger = getLogger(__name__)
+
 
 class Discord:
     """
@@ -10,48 +17,147 @@ class Discord:
     """
 
     MAX_LENGTH = 1600
+    MAX_EMBEDS = 10
+    # Discord limits the total characters of all the embeds of one post
+    MAX_EMBEDS_LENGTH = 6000
 
-    def __init__(self, config: DiscordConfig):
+    def __init__(self, config: DiscordConfig, timeout: float | None = None):
         """
         Initializes the Discord client with the provided configuration.
 
         Args:
-            config (DiscordConfig): Configuration dictionary containing webhook URL.
+            config (DiscordConfig): Configuration dictionary containing webhook URL and subscriptions.
+            timeout (float | None): Timeout of each webhook request in seconds. Uses the aiohttp default when None.
         """
         self.config = config
+        self.timeout = aiohttp.ClientTimeout(total=timeout) if timeout is not None else DEFAULT_TIMEOUT
+        self.router = Router.from_config(config)
 
-    async def send_message(self, message: SummarizedData) -> None:
+    def _build_embed(self, message: SummarizedData, language: str | None = None) -> discord.Embed:
         """
-        Sends a single summarized message to the Discord webhook.
+        Builds the embed of a summarized message.
+
+        Args:
+            message (SummarizedData): The message data, including title, link, author, tags, image URL, and summarized text.
+            language (str | None): Language of the summary to use. Defaults to the primary language.
+
+        Returns:
+            discord.Embed: The embed.
+        """
+        summarized_text = message["summarized_text"]
+        if language is not None:
+            summarized_text = message.get("summarized_texts", {}).get(language, summarized_text)
+        embed = discord.Embed(
+            title=message["title"],
+            url=message["link"],
+            description=summarized_text,
+            color=0x009999,
+        )
+        embed.set_author(name=message["author"])
+        embed.add_field(name="Tags", value=", ".join(message["tags"]), inline=False)
+        image_url: str | None = message["image_url"]
+        if isinstance(image_url, str) and len(image_url) <= self.MAX_LENGTH:
+            embed.set_image(url=image_url)
+        return embed
+
+    async def send_message(self, message: SummarizedData, webhook_url: str, language: str | None = None) -> bool:
+        """
+        Sends a single summarized message to a Discord webhook.
 
         Args:
             message (SummarizedData): The message data to send, including title, link, author, tags, image URL, and summarized text.
+            webhook_url (str): The webhook to send the message to.
+            language (str | None): Language of the summary to send. Defaults to the primary language.
+
+        Returns:
+            bool: Whether the message was sent.
         """
-        webhook_url = self.config["webhook_url"]
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(timeout=self.timeout) as session:
             webhook = discord.Webhook.from_url(webhook_url, session=session)
-            embed = discord.Embed(
-                title=message["title"],
-                url=message["link"],
-                description=message["summarized_text"],
-                color=0x009999,
-            )
-            embed.set_author(name=message["author"])
-            embed.add_field(name="Tags", value=", ".join(message["tags"]), inline=False)
-            image_url: str | None = message["image_url"]
-            if isinstance(image_url, str) and len(image_url) <= self.MAX_LENGTH:
-                embed.set_image(url=image_url)
+            embed = self._build_embed(message, language)
             try:
                 await webhook.send(embed=embed)
             except Exception as e:
-                print(e)
+                logger.warning("Failed to send %s to %s: %s", message["link"], webhook_url, e)
+                return False
+        return True
 
-    async def send_messages(self, messages: list[SummarizedData]) -> None:
+    async def send_combined_message(
+        self, messages: list[SummarizedData], webhook_url: str, language: str | None = None
+    ) -> list[SummarizedData]:
         """
-        Sends multiple summarized messages to the Discord webhook.
+        Sends the articles of one cluster as a combined post: the combined summary followed by one embed per article.
+        A cluster that exceeds the embed limits of a post is split over several posts.
+
+        Args:
+            messages (list[SummarizedData]): Messages of the same cluster.
+            webhook_url (str): The webhook to send the message to.
+            language (str | None): Language of the summaries to send. Defaults to the primary language.
+
+        Returns:
+            list[SummarizedData]: Messages of the posts that could not be sent.
+        """
+        content = messages[0].get("cluster_summary", "")[: self.MAX_LENGTH]
+        posts: list[list[tuple[SummarizedData, discord.Embed]]] = [[]]
+        total_length = 0
+        for message in messages:
+            embed = self._build_embed(message, language)
+            if posts[-1] and (len(posts[-1]) >= self.MAX_EMBEDS or total_length + len(embed) > self.MAX_EMBEDS_LENGTH):
+                posts.append([])
+                total_length = 0
+            posts[-1].append((message, embed))
+            total_length += len(embed)
+        failed: list[SummarizedData] = []
+        async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            webhook = discord.Webhook.from_url(webhook_url, session=session)
+            for i, post in enumerate(posts):
+                try:
+                    await webhook.send(content=content if i == 0 else "", embeds=[embed for _, embed in post])
+                except Exception as e:
+                    logger.warning("Failed to send combined post to %s: %s", webhook_url, e)
+                    failed.extend(message for message, _ in post)
+        return failed
+
+    async def send_messages(
+        self, messages: list[SummarizedData], combine_clusters: bool = False, deadline: Deadline | None = None
+    ) -> list[SummarizedData]:
+        """
+        Sends multiple summarized messages to every webhook whose subscription matches them.
 
         Args:
             messages (list[SummarizedData]): List of message data to send.
+            combine_clusters (bool): Sends the articles of each cluster as one combined post.
+            deadline (Deadline | None): No further message is sent once this deadline expires.
+
+        Returns:
+            list[SummarizedData]: Messages that were not sent because the deadline expired or their post failed.
         """
+        failed: dict[str, SummarizedData] = {}
+        if not combine_clusters:
+            for i, message in enumerate(messages):
+                if deadline is not None and deadline.expired():
+                    return [*failed.values(), *messages[i:]]
+                for subscription in self.router.route(message):
+                    if not await self.send_message(message, subscription["webhook_url"], subscription.get("language")):
+                        failed[message["link"]] = message
+            return list(failed.values())
+        groups: dict[int | str, list[SummarizedData]] = {}
         for message in messages:
-            await self.send_message(message)
+            groups.setdefault(message.get("cluster_id", message["link"]), []).append(message)
+        group_list = list(groups.values())
+        for i, group in enumerate(group_list):
+            if deadline is not None and deadline.expired():
+                return [*failed.values(), *(message for unsent in group_list[i:] for message in unsent)]
+            deliveries: dict[tuple[str, str | None], list[SummarizedData]] = {}
+            for message in group:
+                for subscription in self.router.route(message):
+                    key = (subscription["webhook_url"], subscription.get("language"))
+                    deliveries.setdefault(key, []).append(message)
+            for (webhook_url, language), delivery in deliveries.items():
+                if len(delivery) == 1:
+                    if not await self.send_message(delivery[0], webhook_url, language):
+                        failed[delivery[0]["link"]] = delivery[0]
+                else:
+                    for message in await self.send_combined_message(delivery, webhook_url, language):
+                        failed[message["link"]] = message
+        return list(failed.values())
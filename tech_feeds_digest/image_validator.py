@@ -0,0 +1,138 @@
+import asyncio
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from datetime import datetime, timedelta
+from logging import getLogger
+
+import httpx
+import pytz
+
+from .scraper import Scraper
+from .state import State
+from .types import ImageConfig, SummarizedData
+
+logger = getLogger(__name__)
+
+DEFAULT_CONTENT_TYPES = ["image/png", "image/jpeg", "image/gif", "image/webp"]
+
+
+class ImageValidator:
+    """
+    Checks the og:image of each article before delivery with concurrent HEAD requests.
+    An image is valid if it answers 2xx with an allowed content type and is not larger than `max_bytes`.
+    Results are cached in the state by URL for `ttl_hours`, since many articles share a default image.
+    """
+
+    def __init__(self, config: ImageConfig, state: State, timeout: float = Scraper.TIMEOUT):
+        """
+        Initializes the validator with the given configuration.
+
+        Args:
+            config (ImageConfig): Image validation configuration.
+            state (State): State holding the cached results.
+            timeout (float): Timeout of each request in seconds.
+        """
+        self.config = config
+        self.state = state
+        self.timeout = timeout
+
+    async def _check(self, client: httpx.AsyncClient, url: str) -> bool:
+        """
+        Checks one image. Servers that do not support HEAD are asked with a GET whose body is not read.
+
+        Args:
+            client (httpx.AsyncClient): The HTTP client.
+            url (str): The image URL.
+
+        Returns:
+            bool: Whether the image is valid.
+        """
+        try:
+            res = await client.head(url)
+            if res.status_code in (403, 405, 501):
+                async with client.stream("GET", url) as res:
+                    pass
+        except httpx.HTTPError as e:
+            logger.warning("Failed to check image %s: %s", url, e)
+            return False
+        if not res.is_success:
+            return False
+        content_type = res.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type not in self.config.get("content_types", DEFAULT_CONTENT_TYPES):
+            return False
+        content_length = res.headers.get("content-length")
+        max_bytes = self.config.get("max_bytes", 8 * 1024 * 1024)
+        return content_length is None or not content_length.isdigit() or int(content_length) <= max_bytes
+
+    async def validate_all(self, urls: Iterable[str | None] | AsyncIterable[str | None]) -> dict[str, bool]:
+        """
+        Checks the given images concurrently, using cached results where they are fresh.
+        With an async iterable, each image is checked as soon as it arrives.
+
+        Args:
+            urls (Iterable[str | None] | AsyncIterable[str | None]): Image URLs. Duplicates and None are ignored.
+
+        Returns:
+            dict[str, bool]: Whether each image is valid.
+        """
+        now = datetime.now(pytz.timezone("Asia/Tokyo"))
+        not_before = now - timedelta(hours=self.config.get("ttl_hours", 24.0))
+        self.state.prune_image_checks(not_before)
+        results: dict[str, bool] = {}
+        semaphore = asyncio.Semaphore(self.config.get("concurrency", 8))
+
+        async def check(url: str) -> None:
+            async with semaphore:
+                is_valid = await self._check(client, url)
+            self.state.set_image_check(url, is_valid, now)
+            results[url] = is_valid
+
+        async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
+            tasks: dict[str, asyncio.Task[None]] = {}
+            try:
+                async for url in self._aiter(urls):
+                    if not url or url in results or url in tasks:
+                        continue
+                    cached = self.state.get_image_check(url, not_before)
+                    if cached is None:
+                        tasks[url] = asyncio.create_task(check(url))
+                    else:
+                        results[url] = cached
+            except BaseException:
+                for task in tasks.values():
+                    task.cancel()
+                raise
+            await asyncio.gather(*tasks.values())
+        return results
+
+    @staticmethod
+    async def _aiter(urls: Iterable[str | None] | AsyncIterable[str | None]) -> AsyncIterator[str | None]:
+        """
+        Iterates over a sync or async iterable of URLs.
+
+        Args:
+            urls (Iterable[str | None] | AsyncIterable[str | None]): Image URLs.
+
+        Yields:
+            str | None: Each URL.
+        """
+        if isinstance(urls, AsyncIterable):
+            async for url in urls:
+                yield url
+        else:
+            for url in urls:
+                yield url
+
+    def apply(self, messages: list[SummarizedData], results: dict[str, bool]) -> None:
+        """
+        Replaces invalid images with `fallback_url`, or drops them when no fallback is configured.
+
+        Args:
+            messages (list[SummarizedData]): Messages to update in place.
+            results (dict[str, bool]): Validation result of each image.
+        """
+        fallback_url = self.config.get("fallback_url")
+        for message in messages:
+            image_url = message["image_url"]
+            if image_url and not results.get(image_url, True):
+                logger.info("Replacing invalid image %s: %s", image_url, message["link"])
+                message["image_url"] = fallback_url
@@ -0,0 +1,55 @@
+import fcntl
+import os
+from logging import getLogger
+from pathlib import Path
+from typing import IO
+
+logger = getLogger(__name__)
+
+
+class RunLock:
+    """
+    Non-blocking exclusive file lock that prevents two runs from executing at the same time.
+    The lock is released by the OS if the process dies.
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        Initializes the lock.
+
+        Args:
+            path (str | Path): Path of the lock file.
+        """
+        self.path = Path(path)
+        self._file: IO[str] | None = None
+
+    def acquire(self) -> bool:
+        """
+        Tries to take the lock without waiting.
+
+        Returns:
+            bool: True if the lock was taken, False if another run holds it.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = self.path.open("a+")
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return False
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self) -> None:
+        """
+        Releases the lock if it is held.
+        """
+        if self._file is None:
+            return
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
@@ -0,0 +1,167 @@
+import cProfile
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from logging import getLogger
+from pathlib import Path
+from types import FrameType
+
+logger = getLogger(__name__)
+
+
+class Profiler:
+    """
+    Low-overhead sampling profiler that attributes samples of the calling thread to named stages.
+    A background thread records the stack of the profiled threads every `interval` seconds, and each stage
+    is written as `<stage>.collapsed` (one `frame;frame;frame count` line per stack), the input format of
+    flamegraph.pl, speedscope and inferno. With `deterministic`, each stage is also profiled with cProfile
+    and written as `<stage>.prof`, at a much higher overhead.
+    Work a stage hands to a worker thread is covered when the thread runs it inside `worker`.
+    Work done in worker processes (`parse_workers`) is not sampled.
+    """
+
+    def __init__(self, output_dir: str | Path, interval: float = 0.005, deterministic: bool = False):
+        """
+        Initializes the profiler for the calling thread.
+
+        Args:
+            output_dir (str | Path): Directory the profile files are written to.
+            interval (float): Seconds between two samples.
+            deterministic (bool): Also profiles each stage with cProfile.
+        """
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.deterministic = deterministic
+        self.stacks: dict[str, Counter[str]] = {}
+        self.wall_times: dict[str, float] = {}
+        self.profiles: dict[str, cProfile.Profile] = {}
+        self.worker_profiles: dict[str, list[cProfile.Profile]] = {}
+        self._stage: str | None = None
+        self._thread_ids = {threading.get_ident()}
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Starts the sampler thread.
+        """
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        """
+        Stops the sampler thread and writes the profile files.
+        """
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        self.write()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Attributes the samples taken while the block runs to a stage. Entering the same stage again accumulates.
+        Stages must not be nested.
+
+        Args:
+            name (str): Name of the stage, used as the file name.
+        """
+        self._stage = name
+        profile = self.profiles.setdefault(name, cProfile.Profile()) if self.deterministic else None
+        if profile is not None:
+            profile.enable()
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.wall_times[name] = self.wall_times.get(name, 0.0) + time.perf_counter() - started_at
+            if profile is not None:
+                profile.disable()
+            self._stage = None
+
+    @contextmanager
+    def worker(self) -> Iterator[None]:
+        """
+        Samples the calling thread, and profiles it with cProfile when deterministic, as part of the active stage
+        while the block runs. Meant for a worker thread running part of a stage, such as `asyncio.to_thread`.
+        """
+        stage = self._stage
+        if stage is None:
+            yield
+            return
+        thread_id = threading.get_ident()
+        self._thread_ids.add(thread_id)
+        # A profile only follows the thread that enabled it, so each worker thread gets its own
+        profile = cProfile.Profile() if self.deterministic else None
+        if profile is not None:
+            self.worker_profiles.setdefault(stage, []).append(profile)
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            self._thread_ids.discard(thread_id)
+
+    def _sample_loop(self) -> None:
+        """
+        Records the stack of each profiled thread every `interval` seconds while a stage is active.
+        """
+        while not self._stop.wait(self.interval):
+            stage = self._stage
+            if stage is None:
+                continue
+            frames = sys._current_frames()
+            for thread_id in tuple(self._thread_ids):
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.stacks.setdefault(stage, Counter())[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame: FrameType | None) -> str:
+        """
+        Converts a stack into a collapsed-stack line, outermost frame first.
+
+        Args:
+            frame (FrameType | None): Innermost frame.
+
+        Returns:
+            str: Frames separated by semicolons.
+        """
+        names: list[str] = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def write(self) -> None:
+        """
+        Writes `<stage>.collapsed` and, when deterministic, `<stage>.prof` for every stage.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for name, wall_time in self.wall_times.items():
+            stacks = self.stacks.get(name, Counter())
+            with (self.output_dir / f"{name}.collapsed").open("w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            if name in self.profiles:
+                stats = pstats.Stats(self.profiles[name])
+                for profile in self.worker_profiles.get(name, []):
+                    stats.add(profile)
+                stats.dump_stats(self.output_dir / f"{name}.prof")
+            logger.info("Stage %s: %.2fs, %d samples", name, wall_time, stacks.total())
+        logger.info("Profiles written to %s", self.output_dir)
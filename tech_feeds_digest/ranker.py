@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytz
+
+from .types import FeedData, RankingConfig, ScrapedData
+
+
+class Ranker:
+    """
+    Scores articles so the most relevant ones are summarized first. Feed entries are ranked before
+    scraping from their source, recency and the weighted tags found in their title, since feeds carry
+    no tags; scraped articles are scored from their actual tags and content length as well.
+    """
+
+    LENGTH_NORM = 10000
+
+    def __init__(self, config: RankingConfig, now: datetime | None = None):
+        """
+        Initializes the Ranker with the given configuration.
+
+        Args:
+            config (RankingConfig): Weights used for scoring.
+            now (datetime | None): Reference time for recency. Defaults to the current time.
+        """
+        self.config = config
+        self.now = now or datetime.now(pytz.timezone("Asia/Tokyo"))
+        self._tag_weights = {tag.casefold(): weight for tag, weight in config.get("tag_weights", {}).items()}
+
+    def _base_score(self, feed_data: FeedData) -> float:
+        """
+        Scores an entry from its source and recency.
+
+        Args:
+            feed_data (FeedData): The entry to score.
+
+        Returns:
+            float: The score.
+        """
+        source_score = self.config.get("source_weights", {}).get(feed_data["source"], 0.0)
+        age_hours = max((self.now - feed_data["published"]).total_seconds() / 3600, 0.0)
+        recency = 0.5 ** (age_hours / self.config.get("recency_half_life_hours", 24.0))
+        return source_score + self.config.get("recency_weight", 1.0) * recency
+
+    def score_entry(self, feed_data: FeedData) -> float:
+        """
+        Scores a feed entry before scraping from its source, recency and the weighted tags that appear in its title.
+
+        Args:
+            feed_data (FeedData): The entry to score.
+
+        Returns:
+            float: The score. Higher is more important.
+        """
+        title = feed_data["title"].casefold()
+        tag_score = sum(weight for tag, weight in self._tag_weights.items() if tag in title)
+        return tag_score + self._base_score(feed_data)
+
+    def rank_entries(self, feed_data_list: list[FeedData]) -> list[FeedData]:
+        """
+        Sorts feed entries from the highest score to the lowest.
+
+        Args:
+            feed_data_list (list[FeedData]): Entries to rank.
+
+        Returns:
+            list[FeedData]: Ranked entries.
+        """
+        return sorted(feed_data_list, key=self.score_entry, reverse=True)
+
+    def score(self, scraped_data: ScrapedData) -> float:
+        """
+        Scores an article from its tags, source, recency and content length.
+
+        Args:
+            scraped_data (ScrapedData): The article to score.
+
+        Returns:
+            float: The score. Higher is more important.
+        """
+        tag_score = sum(self._tag_weights.get(tag.casefold(), 0.0) for tag in set(scraped_data["tags"]))
+        length = min(len(scraped_data["content"]) / self.LENGTH_NORM, 1.0)
+        return tag_score + self._base_score(scraped_data) + self.config.get("length_weight", 0.0) * length
+
+    def rank(self, scraped_data_list: list[ScrapedData]) -> list[ScrapedData]:
+        """
+        Sorts articles from the highest score to the lowest.
+
+        Args:
+            scraped_data_list (list[ScrapedData]): Articles to rank.
+
+        Returns:
+            list[ScrapedData]: Ranked articles.
+        """
+        return sorted(scraped_data_list, key=self.score, reverse=True)
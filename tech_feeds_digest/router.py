@@ -0,0 +1,77 @@
+from logging import getLogger
+
+from .types import DiscordConfig, SubscriptionConfig, SummarizedData
+
+logger = getLogger(__name__)
+
+
+class Router:
+    """
+    Routes summarized articles to the subscriptions whose tag and source filters they match.
+    """
+
+    def __init__(self, subscriptions: list[SubscriptionConfig]):
+        """
+        Precompiles a tag -> subscription index so routing cost depends on the article's tags,
+        not on the number of subscriptions.
+
+        Args:
+            subscriptions (list[SubscriptionConfig]): Subscriptions to route to.
+        """
+        self.subscriptions = subscriptions
+        self._tag_index: dict[str, list[int]] = {}
+        self._untagged: list[int] = []
+        self._sources: list[frozenset[str] | None] = []
+        for i, subscription in enumerate(subscriptions):
+            tags = subscription.get("tags")
+            if tags:
+                for tag in {tag.casefold() for tag in tags}:
+                    self._tag_index.setdefault(tag, []).append(i)
+            else:
+                self._untagged.append(i)
+            sources = subscription.get("sources")
+            self._sources.append(frozenset(sources) if sources else None)
+
+    @staticmethod
+    def from_config(config: DiscordConfig) -> "Router":
+        """
+        Builds a router from the Discord configuration. A top-level `webhook_url`
+        is treated as a subscription without filters.
+
+        Args:
+            config (DiscordConfig): Discord configuration.
+
+        Returns:
+            Router: Router covering every configured webhook.
+        """
+        subscriptions: list[SubscriptionConfig] = list(config.get("subscriptions", []))
+        webhook_url = config.get("webhook_url")
+        if webhook_url:
+            subscriptions.append({"webhook_url": webhook_url})
+        return Router(subscriptions)
+
+    def route(self, message: SummarizedData) -> list[SubscriptionConfig]:
+        """
+        Returns the subscriptions that should receive the given message.
+
+        Args:
+            message (SummarizedData): The summarized article to route.
+
+        Returns:
+            list[SubscriptionConfig]: Matching subscriptions, in configuration order. When several of them
+                share a webhook, only the first is returned so the message is posted to it once.
+        """
+        candidates = set(self._untagged)
+        for tag in message["tags"]:
+            candidates.update(self._tag_index.get(tag.casefold(), ()))
+        matched: list[SubscriptionConfig] = []
+        webhook_urls: set[str] = set()
+        for i in sorted(candidates):
+            sources = self._sources[i]
+            webhook_url = self.subscriptions[i]["webhook_url"]
+            if (sources is None or message["source"] in sources) and webhook_url not in webhook_urls:
+                webhook_urls.add(webhook_url)
+                matched.append(self.subscriptions[i])
+        if not matched:
+            logger.debug("No subscription matched: %s", message["link"])
+        return matched
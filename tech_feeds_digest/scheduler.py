@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+from .state import State
+from .types import PollingConfig
+
+
+class PollScheduler:
+    """
+    Decides which feeds to poll in a run from the publish rate observed on each of them.
+    A feed is polled again once `target_entries_per_poll` new entries are expected, so busy feeds are
+    polled every run and quiet ones back off up to `max_interval_hours`. A feed that is polled after
+    skipped runs looks back to its previous poll, so no entry falls between two polls.
+    """
+
+    # Runs start a little earlier or later than scheduled; a feed due within this margin is polled
+    SLACK = timedelta(minutes=5)
+
+    def __init__(self, config: PollingConfig, state: State):
+        """
+        Initializes the scheduler with the given configuration.
+
+        Args:
+            config (PollingConfig): Polling configuration.
+            state (State): State holding the polling schedule of each feed.
+        """
+        self.config = config
+        self.state = state
+
+    def plan(self, urls: list[str], lookback_hours: float, now: datetime) -> dict[str, float]:
+        """
+        Selects the feeds to poll in this run.
+
+        Args:
+            urls (list[str]): Every configured feed URL.
+            lookback_hours (float): The configured number of hours to look back.
+            now (datetime): Start of the run.
+
+        Returns:
+            dict[str, float]: Lookback hours of each feed to poll, covering at least the time since its previous poll.
+        """
+        lookbacks: dict[str, float] = {}
+        for url in urls:
+            poll = self.state.get_poll(url)
+            if poll is None:
+                lookbacks[url] = lookback_hours
+                continue
+            if datetime.fromisoformat(poll["next_poll"]) - self.SLACK > now:
+                continue
+            since_last_poll = (now - datetime.fromisoformat(poll["last_polled"])).total_seconds() / 3600
+            lookbacks[url] = max(lookback_hours, since_last_poll)
+        return lookbacks
+
+    def interval_hours(self, rate: float) -> float:
+        """
+        Returns the time until the next poll of a feed.
+
+        Args:
+            rate (float): Estimated new entries per hour.
+
+        Returns:
+            float: Hours until the next poll.
+        """
+        min_interval = self.config.get("min_interval_hours", 0.0)
+        max_interval = self.config.get("max_interval_hours", 24.0)
+        if rate <= 0:
+            return max_interval
+        return min(max(self.config.get("target_entries_per_poll", 5.0) / rate, min_interval), max_interval)
+
+    def record(self, counts: dict[str, int], lookbacks: dict[str, float], now: datetime) -> None:
+        """
+        Updates the publish rate and the next poll of each polled feed.
+
+        Args:
+            counts (dict[str, int]): Number of new entries found on each polled feed.
+            lookbacks (dict[str, float]): Lookback hours each feed was polled with.
+            now (datetime): Start of the run.
+        """
+        smoothing = self.config.get("smoothing", 0.3)
+        for url, count in counts.items():
+            poll = self.state.get_poll(url)
+            if poll is None:
+                rate = count / max(lookbacks[url], 1.0)
+            else:
+                hours = (now - datetime.fromisoformat(poll["last_polled"])).total_seconds() / 3600
+                rate = smoothing * count / max(hours, 1.0) + (1 - smoothing) * poll["rate"]
+            self.state.set_poll(url, now, now + timedelta(hours=self.interval_hours(rate)), rate)
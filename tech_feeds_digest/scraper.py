@@ -1,4 +1,8 @@
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, Future
 from logging import getLogger
+from typing import Literal, cast
 
 import frontmatter
 import httpx
@@ -15,43 +19,61 @@ class Scraper:
     Scraper class for fetching and extracting article data from web pages.
     """
 
+    TIMEOUT = 30.0
+
     @staticmethod
-    def _http_get(link: str) -> BeautifulSoup:
+    def _http_get_text(link: str, timeout: float = TIMEOUT) -> str:
         """
-        Sends an HTTP GET request to the specified URL and returns a BeautifulSoup object.
+        Sends an HTTP GET request to the specified URL and returns the response body.
 
         Args:
             link (str): The URL to fetch.
+            timeout (float): Timeout of the request in seconds.
 
         Returns:
-            BeautifulSoup: Parsed HTML content of the response.
+            str: Body of the response.
         """
         res = httpx.get(
             link,
             headers={
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36"
             },
+            timeout=timeout,
         )
         res.raise_for_status()
-        return BeautifulSoup(res.text, "lxml")
+        return res.text
 
     @staticmethod
-    def _get_qiita_data(link: str) -> ContentData:
+    def _http_get(link: str) -> BeautifulSoup:
         """
-        Extracts article data from a Qiita article page.
+        Sends an HTTP GET request to the specified URL and returns a BeautifulSoup object.
+
+        Args:
+            link (str): The URL to fetch.
+
+        Returns:
+            BeautifulSoup: Parsed HTML content of the response.
+        """
+        return BeautifulSoup(Scraper._http_get_text(link), "lxml")
+
+    @staticmethod
+    def _parse_qiita_data(link: str, md_text: str, html: str) -> ContentData:
+        """
+        Extracts article data from the raw Markdown and HTML of a Qiita article.
 
         Args:
             link (str): Qiita article URL.
+            md_text (str): Raw response of the Markdown endpoint of the article.
+            html (str): Raw HTML of the article page.
 
         Returns:
             ContentData: Extracted article information including link, tags, image URL, content, and author.
         """
-        bs = Scraper._http_get(f"{link}.md")
-        md = bs.get_text(strip=True)
+        md = BeautifulSoup(md_text, "lxml").get_text(strip=True)
         f = frontmatter.loads(md)
         meta = f.metadata
         # Get image URL
-        soup = Scraper._http_get(link)
+        soup = BeautifulSoup(html, "lxml")
         og_image_elm = soup.select_one("meta[property='og:image']")
         image_url: str | None = str(og_image_elm["content"]) if og_image_elm is not None else None
         # Return data
@@ -64,17 +86,32 @@ class Scraper:
         }
 
     @staticmethod
-    def _get_zenn_data(link: str) -> ContentData:
+    def _get_qiita_data(link: str, timeout: float = TIMEOUT) -> ContentData:
         """
-        Extracts article data from a Zenn article page.
+        Extracts article data from a Qiita article page.
+
+        Args:
+            link (str): Qiita article URL.
+            timeout (float): Timeout of each request in seconds.
+
+        Returns:
+            ContentData: Extracted article information including link, tags, image URL, content, and author.
+        """
+        return Scraper._parse_qiita_data(link, *Scraper._fetch_raw("qiita", link, timeout))
+
+    @staticmethod
+    def _parse_zenn_data(link: str, html: str) -> ContentData:
+        """
+        Extracts article data from the raw HTML of a Zenn article.
 
         Args:
             link (str): Zenn article URL.
+            html (str): Raw HTML of the article page.
 
         Returns:
             ContentData: Extracted article information including link, tags, image URL, content, and author.
         """
-        bs = Scraper._http_get(link)
+        bs = BeautifulSoup(html, "lxml")
         # Extract tags
         tag_elms = bs.select("div.View_topics__2sHkl a.View_topicLink__jdtX_")
         tags: list[str] = [tag_elm.get_text(strip=True) for tag_elm in tag_elms]
@@ -97,54 +134,190 @@ class Scraper:
         }
 
     @staticmethod
-    def _get_data(feed_data: FeedData) -> ContentData:
+    def _get_zenn_data(link: str, timeout: float = TIMEOUT) -> ContentData:
         """
-        Extracts content data based on the source type from feed data.
+        Extracts article data from a Zenn article page.
 
         Args:
-            feed_data (FeedData): The feed data containing source and link.
+            link (str): Zenn article URL.
+            timeout (float): Timeout of each request in seconds.
+
+        Returns:
+            ContentData: Extracted article information including link, tags, image URL, content, and author.
+        """
+        return Scraper._parse_zenn_data(link, *Scraper._fetch_raw("zenn", link, timeout))
+
+    @staticmethod
+    def _fetch_raw(source: Literal["zenn", "qiita"], link: str, timeout: float = TIMEOUT) -> tuple[str, ...]:
+        """
+        Downloads the raw documents needed to extract the data of an article.
+
+        Args:
+            source (Literal["zenn", "qiita"]): Source of the article.
+            link (str): Article URL.
+            timeout (float): Timeout of each request in seconds.
+
+        Returns:
+            tuple[str, ...]: Raw documents, in the order expected by the source's parse method.
+        """
+        if source == "qiita":
+            return Scraper._http_get_text(f"{link}.md", timeout), Scraper._http_get_text(link, timeout)
+        return (Scraper._http_get_text(link, timeout),)
+
+    @staticmethod
+    def _parse_raw(source: Literal["zenn", "qiita"], link: str, raw: tuple[str, ...]) -> ContentData:
+        """
+        Extracts article data from raw documents. This is CPU-bound and safe to run in a worker process.
+
+        Args:
+            source (Literal["zenn", "qiita"]): Source of the article.
+            link (str): Article URL.
+            raw (tuple[str, ...]): Raw documents returned by `_fetch_raw`.
 
         Returns:
             ContentData: Extracted content data.
         """
+        if source == "qiita":
+            return Scraper._parse_qiita_data(link, *raw)
+        return Scraper._parse_zenn_data(link, *raw)
+
+    @staticmethod
+    def _validate(feed_data: FeedData) -> tuple[Literal["zenn", "qiita"], str]:
+        """
+        Validates the source and link of feed data.
+
+        Args:
+            feed_data (FeedData): The feed data containing source and link.
+
+        Returns:
+            tuple[Literal["zenn", "qiita"], str]: Source and link of the entry.
+        """
         source: str | None = feed_data.get("source")
         if isinstance(source, str) and source in ["zenn", "qiita"]:
             link: str | None = feed_data.get("link")
             if isinstance(link, str):
-                if source == "zenn":
-                    rz: ContentData = Scraper._get_zenn_data(link)
-                    return rz
-                elif source == "qiita":
-                    rq: ContentData = Scraper._get_qiita_data(link)
-                    return rq
-            else:
-                logger.error(
-                    f"Skipping entry due to missing/invalid link for source '{source}': {feed_data.get('title', 'Unknown Title')}"
-                )
+                return cast(Literal["zenn", "qiita"], source), link
+            logger.error(
+                f"Skipping entry due to missing/invalid link for source '{source}': {feed_data.get('title', 'Unknown Title')}"
+            )
         else:
             logger.error(f"Skipping entry due to invalid/missing source: {source}")
         raise ValueError("Invalid feed data")
 
     @staticmethod
-    def run(feed_data_list: list[FeedData]) -> list[ScrapedData]:
+    def _get_data(feed_data: FeedData, timeout: float = TIMEOUT) -> ContentData:
         """
-        Processes a list of feed data entries and returns a list of scraped data.
+        Extracts content data based on the source type from feed data.
 
         Args:
-            feed_data_list (list[FeedData]): List of feed data entries.
+            feed_data (FeedData): The feed data containing source and link.
+            timeout (float): Timeout of each request in seconds.
 
         Returns:
-            list[ScrapedData]: List of scraped data records.
+            ContentData: Extracted content data.
+        """
+        source, link = Scraper._validate(feed_data)
+        if source == "zenn":
+            rz: ContentData = Scraper._get_zenn_data(link, timeout)
+            return rz
+        rq: ContentData = Scraper._get_qiita_data(link, timeout)
+        return rq
+
+    @staticmethod
+    def _iter_run_with_executor(
+        feed_data_iter: Iterable[FeedData],
+        executor: Executor,
+        max_pending: int,
+        timeout: float,
+        failed: list[FeedData] | None = None,
+    ) -> Iterator[ScrapedData]:
         """
-        data: list[ScrapedData] = []
-        for feed_data in feed_data_list:
+        Downloads articles in the calling thread and parses them on the executor, yielding records in input order.
+
+        Args:
+            feed_data_iter (Iterable[FeedData]): Feed data entries to process.
+            executor (Executor): Executor used for parsing.
+            max_pending (int): Maximum number of articles waiting to be parsed.
+            timeout (float): Timeout of each request in seconds.
+            failed (list[FeedData] | None): Receives the entries that could not be downloaded.
+
+        Yields:
+            ScrapedData: Scraped data record for each entry that could be fetched.
+        """
+        pending: deque[tuple[FeedData, Future[ContentData]]] = deque()
+
+        def collect() -> Iterator[ScrapedData]:
+            feed_data, future = pending.popleft()
             try:
-                content_data: ContentData = Scraper._get_data(feed_data)
+                content_data: ContentData = future.result()
                 record: ScrapedData = {**feed_data, **content_data}
-                data.append(record)
-            except httpx.HTTPStatusError as e:
-                logger.error("HTTPStatusError: %s", e)
+                yield record
+            except yaml.parser.ParserError as e:
+                logger.error("ParserError: %s", e)
+
+        for feed_data in feed_data_iter:
+            source, link = Scraper._validate(feed_data)
+            try:
+                raw = Scraper._fetch_raw(source, link, timeout)
+            except httpx.HTTPError as e:
+                logger.error("Failed to fetch %s: %r", link, e)
+                if failed is not None:
+                    failed.append(feed_data)
+                continue
+            pending.append((feed_data, executor.submit(Scraper._parse_raw, source, link, raw)))
+            if len(pending) >= max_pending:
+                yield from collect()
+        while pending:
+            yield from collect()
+
+    @staticmethod
+    def iter_run(
+        feed_data_iter: Iterable[FeedData],
+        executor: Executor | None = None,
+        max_pending: int = 16,
+        timeout: float = TIMEOUT,
+        failed: list[FeedData] | None = None,
+    ) -> Iterator[ScrapedData]:
+        """
+        Lazily scrapes feed data entries, yielding one scraped record at a time.
+        An entry that cannot be downloaded, such as on a timeout, is skipped and the run continues.
+
+        Args:
+            feed_data_iter (Iterable[FeedData]): Feed data entries to process.
+            executor (Executor | None): Executor to offload HTML/Markdown parsing to, such as a ProcessPoolExecutor.
+            max_pending (int): Maximum number of articles waiting to be parsed when an executor is used.
+            timeout (float): Timeout of each request in seconds.
+            failed (list[FeedData] | None): Receives the entries that could not be downloaded.
+
+        Yields:
+            ScrapedData: Scraped data record for each entry that could be fetched.
+        """
+        if executor is not None:
+            yield from Scraper._iter_run_with_executor(feed_data_iter, executor, max_pending, timeout, failed)
+            return
+        for feed_data in feed_data_iter:
+            try:
+                content_data: ContentData = Scraper._get_data(feed_data, timeout)
+            except httpx.HTTPError as e:
+                logger.error("Failed to fetch %s: %r", feed_data.get("link"), e)
+                if failed is not None:
+                    failed.append(feed_data)
                 continue
             except yaml.parser.ParserError as e:
                 logger.error("ParserError: %s", e)
-        return data
+                continue
+            record: ScrapedData = {**feed_data, **content_data}
+            yield record
+
+    @staticmethod
+    def run(feed_data_list: list[FeedData]) -> list[ScrapedData]:
+        """
+        Processes a list of feed data entries and returns a list of scraped data.
+
+        Args:
+            feed_data_list (list[FeedData]): List of feed data entries.
+
+        Returns:
+            list[ScrapedData]: List of scraped data records.
+        """
+        return list(Scraper.iter_run(feed_data_list))
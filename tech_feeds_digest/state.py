@@ -0,0 +1,258 @@
+import json
+from datetime import datetime
+from logging import getLogger
+from pathlib import Path
+from typing import Literal, TypedDict
+
+from .types import FeedData
+
+logger = getLogger(__name__)
+
+
+class HighWaterMark(TypedDict):
+    published: str
+    link: str
+
+
+class DeferredEntry(TypedDict):
+    title: str
+    link: str
+    published: str
+    source: Literal["zenn", "qiita"]
+
+
+class PollRecord(TypedDict):
+    last_polled: str
+    next_poll: str
+    rate: float
+
+
+class ImageCheck(TypedDict):
+    valid: bool
+    checked_at: str
+
+
+class StateData(TypedDict):
+    feeds: dict[str, HighWaterMark]
+    deferred: list[DeferredEntry]
+    polls: dict[str, PollRecord]
+    images: dict[str, ImageCheck]
+
+
+class State:
+    """
+    Persists data that has to survive between runs, such as the newest entry seen on each feed.
+    High-water marks and poll records set during a run are staged and only take effect once the run
+    calls `commit`, so a run that fails part-way reads the same entries again next time. Likewise, entries
+    taken from the carry-over list stay in it until `commit`.
+    """
+
+    def __init__(self, path: Path | None = None, data: StateData | None = None):
+        """
+        Initializes the state.
+
+        Args:
+            path (Path | None): Path of the JSON state file. The state is kept in memory only when None.
+            data (StateData | None): Previously saved state data.
+        """
+        self.path = path
+        self.data: StateData = data or {"feeds": {}, "deferred": [], "polls": {}, "images": {}}
+        self._pending_feeds: dict[str, HighWaterMark] = {}
+        self._pending_polls: dict[str, PollRecord] = {}
+        self._popped_links: set[str] = set()
+        self._redeferred_links: set[str] = set()
+
+    @staticmethod
+    def load(path: str | Path | None) -> "State":
+        """
+        Loads the state from a JSON file. A missing or broken file results in an empty state.
+
+        Args:
+            path (str | Path | None): Path of the JSON state file.
+
+        Returns:
+            State: The loaded state.
+        """
+        if path is None:
+            return State()
+        state_path = Path(path)
+        if not state_path.exists():
+            return State(state_path)
+        try:
+            with state_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Failed to load state from %s: %s", state_path, e)
+            return State(state_path)
+        data.setdefault("feeds", {})
+        data.setdefault("deferred", [])
+        data.setdefault("polls", {})
+        data.setdefault("images", {})
+        return State(state_path, data)
+
+    def commit(self) -> None:
+        """
+        Applies the high-water marks and poll records staged during the run, and drops the carried-over
+        entries it took unless they were deferred again.
+        """
+        self.data["feeds"].update(self._pending_feeds)
+        self.data["polls"].update(self._pending_polls)
+        dropped_links = self._popped_links - self._redeferred_links
+        self.data["deferred"] = [entry for entry in self.data["deferred"] if entry["link"] not in dropped_links]
+        self._pending_feeds = {}
+        self._pending_polls = {}
+        self._popped_links = set()
+        self._redeferred_links = set()
+
+    def save(self) -> None:
+        """
+        Writes the state to its JSON file, replacing it atomically. Staged changes that were not committed are not written.
+        """
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f"{self.path.suffix}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        tmp_path.replace(self.path)
+
+    def get_high_water_mark(self, url: str) -> tuple[datetime | None, str | None]:
+        """
+        Returns the newest entry seen so far on the given feed.
+
+        Args:
+            url (str): The feed URL.
+
+        Returns:
+            tuple[datetime | None, str | None]: Published datetime and link of the newest seen entry.
+        """
+        mark = self.data["feeds"].get(url)
+        if mark is None:
+            return None, None
+        return datetime.fromisoformat(mark["published"]), mark["link"]
+
+    def set_high_water_mark(self, url: str, published: datetime, link: str) -> None:
+        """
+        Stages the newest entry seen on the given feed until `commit`.
+
+        Args:
+            url (str): The feed URL.
+            published (datetime): Published datetime of the newest entry.
+            link (str): Link of the newest entry.
+        """
+        self._pending_feeds[url] = {"published": published.isoformat(), "link": link}
+
+    def get_poll(self, url: str) -> PollRecord | None:
+        """
+        Returns the polling schedule of the given feed.
+
+        Args:
+            url (str): The feed URL.
+
+        Returns:
+            PollRecord | None: The schedule, or None if the feed was never polled.
+        """
+        return self.data["polls"].get(url)
+
+    def set_poll(self, url: str, last_polled: datetime, next_poll: datetime, rate: float) -> None:
+        """
+        Stages the polling schedule of the given feed until `commit`.
+
+        Args:
+            url (str): The feed URL.
+            last_polled (datetime): When the feed was polled.
+            next_poll (datetime): When the feed should be polled next.
+            rate (float): Estimated new entries per hour.
+        """
+        self._pending_polls[url] = {"last_polled": last_polled.isoformat(), "next_poll": next_poll.isoformat(), "rate": rate}
+
+    def get_image_check(self, url: str, not_before: datetime) -> bool | None:
+        """
+        Returns the cached validation result of an image.
+
+        Args:
+            url (str): The image URL.
+            not_before (datetime): Results checked before this time are expired.
+
+        Returns:
+            bool | None: Whether the image is valid, or None if it has no fresh result.
+        """
+        check = self.data["images"].get(url)
+        if check is None or datetime.fromisoformat(check["checked_at"]) < not_before:
+            return None
+        return check["valid"]
+
+    def set_image_check(self, url: str, valid: bool, checked_at: datetime) -> None:
+        """
+        Caches the validation result of an image.
+
+        Args:
+            url (str): The image URL.
+            valid (bool): Whether the image is valid.
+            checked_at (datetime): When the image was checked.
+        """
+        self.data["images"][url] = {"valid": valid, "checked_at": checked_at.isoformat()}
+
+    def prune_image_checks(self, not_before: datetime) -> None:
+        """
+        Drops the image validation results that have expired.
+
+        Args:
+            not_before (datetime): Results checked before this time are dropped.
+        """
+        self.data["images"] = {
+            url: check
+            for url, check in self.data["images"].items()
+            if datetime.fromisoformat(check["checked_at"]) >= not_before
+        }
+
+    def defer(self, feed_data_list: list[FeedData]) -> None:
+        """
+        Carries entries over to the next run.
+
+        Args:
+            feed_data_list (list[FeedData]): Entries that were not processed in this run.
+        """
+        deferred_links = {entry["link"] for entry in self.data["deferred"]}
+        for feed_data in feed_data_list:
+            if feed_data["link"] in self._popped_links:
+                self._redeferred_links.add(feed_data["link"])
+            if feed_data["link"] in deferred_links:
+                continue
+            deferred_links.add(feed_data["link"])
+            self.data["deferred"].append(
+                {
+                    "title": feed_data["title"],
+                    "link": feed_data["link"],
+                    "published": feed_data["published"].isoformat(),
+                    "source": feed_data["source"],
+                }
+            )
+
+    def pop_deferred(self, not_before: datetime | None = None) -> list[FeedData]:
+        """
+        Takes the entries carried over from previous runs. They are removed from the state on `commit`,
+        so they are carried over again if the run fails.
+
+        Args:
+            not_before (datetime | None): Entries published before this time are discarded.
+
+        Returns:
+            list[FeedData]: Entries to process in this run.
+        """
+        entries = [entry for entry in self.data["deferred"] if entry["link"] not in self._popped_links]
+        self._popped_links.update(entry["link"] for entry in entries)
+        data: list[FeedData] = []
+        for entry in entries:
+            published = datetime.fromisoformat(entry["published"])
+            if not_before is not None and published < not_before:
+                continue
+            data.append(
+                {
+                    "title": entry["title"],
+                    "link": entry["link"],
+                    "published": published,
+                    "source": entry["source"],
+                }
+            )
+        return data
@@ -1,5 +1,6 @@
+from collections.abc import Iterable, Iterator
 from logging import getLogger
-from typing import cast
+from typing import TypeVar, cast
 
 import openai
 from langchain.prompts import ChatPromptTemplate
@@ -7,10 +8,14 @@ from langchain.schema import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
+from .budget import Budget
+from .cascade import Cascade
 from .types import LLMConfig, ScrapedData, SummarizedData
 
 logger = getLogger(__name__)
 
+T = TypeVar("T", bound=BaseModel)
+
 
 class OutputText(BaseModel):
     """
@@ -20,55 +25,281 @@ class OutputText(BaseModel):
     summarized_text: str = Field(..., description="Summarized text")
 
 
+class LanguageOutputText(BaseModel):
+    """
+    Defines the structure of a summary written in one language.
+    """
+
+    language: str = Field(..., description="Language of the summary, exactly as requested")
+    summarized_text: str = Field(..., description="Summarized text in that language")
+
+
+class MultiLanguageOutputText(BaseModel):
+    """
+    Defines the structure of the output result when several languages are requested.
+    """
+
+    summaries: list[LanguageOutputText] = Field(..., description="One summary per requested language")
+
+
+class ArticleOutputText(BaseModel):
+    """
+    Defines the structure of the summary of one article within a cluster.
+    """
+
+    article: int = Field(..., description="Number N of the article, as given by its [Article N] header")
+    summarized_text: str = Field(..., description="Summarized text of this article")
+
+
+class ClusterOutputText(BaseModel):
+    """
+    Defines the structure of the output result for a cluster of related articles.
+    """
+
+    combined_summary: str = Field(..., description="Short summary of the topic the articles share")
+    summaries: list[ArticleOutputText] = Field(..., description="One summary per article")
+
+
+CLUSTER_INSTRUCTION = (
+    "\nThe user provides several related articles, each starting with an [Article N] header. "
+    "Summarize every article separately, and also write a short combined summary of the topic they share."
+)
+
+CONFIDENCE_DESCRIPTION = "How confident you are that the summary is accurate and captures the article, from 0 to 1"
+
+
+class RatedOutputText(OutputText):
+    """
+    Output result with a self-reported confidence, used by the cheap model of the cascade.
+    """
+
+    confidence: float = Field(..., ge=0.0, le=1.0, description=CONFIDENCE_DESCRIPTION)
+
+
+class RatedMultiLanguageOutputText(MultiLanguageOutputText):
+    """
+    Multi-language output result with a self-reported confidence, used by the cheap model of the cascade.
+    """
+
+    confidence: float = Field(..., ge=0.0, le=1.0, description=CONFIDENCE_DESCRIPTION)
+
+
 class Summarizer:
     """
     Class responsible for performing text summarization.
     """
 
-    def __init__(self, config: LLMConfig):
+    def __init__(self, config: LLMConfig, timeout: float | None = None, budget: Budget | None = None):
         """
         Initializes the Summarizer with the given configuration.
         :param config: Configuration dictionary for the LLM.
+        :param timeout: Timeout of each LLM request in seconds. Uses the client default when None.
+        :param budget: Budget charged for summaries escalated to `openai_model` by the cascade.
         """
         self.config = config
+        self.timeout = timeout
+        self.budget = budget
+        cascade_config = config.get("cascade")
+        self.cascade = Cascade(cascade_config) if cascade_config is not None else None
 
-    def _summarize(self, scraped_data: ScrapedData) -> str:
+    def _languages(self) -> list[str]:
         """
-        Summarizes the given scraped data.
-        :param scraped_data: The data obtained from scraping.
-        :return: The summarized text.
+        Returns the configured output languages, the first one being the primary language.
+        :return: List of languages.
+        """
+        return self.config.get("languages") or [self.config["language"]]
+
+    def _invoke(self, system_content: str, content: str, output_model: type[T], model: str | None = None) -> T:
+        """
+        Sends the system prompt and article content to the LLM and parses the structured output.
+        :param system_content: The system prompt.
+        :param content: The article content.
+        :param output_model: The structured output model.
+        :param model: The model to use. Defaults to `openai_model`.
+        :return: The parsed output.
         """
         llm = ChatOpenAI(
-            model=self.config["openai_model"],
+            model=model or self.config["openai_model"],
             temperature=self.config["temperature"],
+            timeout=self.timeout,
         )
-        system_message = SystemMessage(
-            content=str(
-                self.config["prompt"].format(
-                    language=self.config["language"],
-                )
-            )
-        )
-        human_message = HumanMessage(content=scraped_data["content"])
+        system_message = SystemMessage(content=system_content)
+        human_message = HumanMessage(content=content)
         prompt = ChatPromptTemplate.from_messages([system_message, human_message])
-        chain = prompt | llm.with_structured_output(OutputText)
+        chain = prompt | llm.with_structured_output(output_model)
         res = chain.invoke({})
-        return cast(OutputText, res).summarized_text
+        return cast(T, res)
 
-    def run(self, scraped_data_list: ScrapedData) -> list[SummarizedData]:
+    def _request(
+        self, scraped_data: ScrapedData, model: str | None = None, rated: bool = False
+    ) -> tuple[dict[str, str], float | None]:
         """
-        Summarizes a list of scraped data and returns the results.
-        :param scraped_data_list: List of scraped data.
-        :return: List of summarized data with texts.
+        Summarizes the given scraped data into every configured language with a single LLM call,
+        so the article content is sent only once.
+        :param scraped_data: The data obtained from scraping.
+        :param model: The model to use. Defaults to `openai_model`.
+        :param rated: Asks the model to report its confidence.
+        :return: Mapping of language to summarized text, and the reported confidence.
+        """
+        languages = self._languages()
+        if len(languages) == 1:
+            system_content = str(self.config["prompt"].format(language=languages[0]))
+            output = self._invoke(system_content, scraped_data["content"], RatedOutputText if rated else OutputText, model)
+            return {languages[0]: output.summarized_text}, getattr(output, "confidence", None)
+        system_content = str(self.config["prompt"].format(language=", ".join(languages)))
+        system_content += f"\nWrite one summary for each of the following languages: {', '.join(languages)}"
+        output_model = RatedMultiLanguageOutputText if rated else MultiLanguageOutputText
+        res = self._invoke(system_content, scraped_data["content"], output_model, model)
+        by_key = {language.casefold(): language for language in languages}
+        texts: dict[str, str] = {}
+        for summary in res.summaries:
+            language = by_key.get(summary.language.strip().casefold())
+            if language is not None:
+                texts[language] = summary.summarized_text
+        missing = [language for language in languages if language not in texts]
+        if missing:
+            logger.warning("Missing summaries for %s: %s", missing, scraped_data["link"])
+        return texts, getattr(res, "confidence", None)
+
+    def model_for(self, scraped_data: ScrapedData) -> str | None:
+        """
+        Returns the model the given article is first summarized with, so the budget can price it.
+        :param scraped_data: The data obtained from scraping.
+        :return: The model, or None if the article is summarized without an LLM.
+        """
+        if self.cascade is None:
+            return self.config["openai_model"]
+        tier = self.cascade.route(scraped_data["content"], allow_extractive=len(self._languages()) == 1)
+        if tier == "extractive":
+            return None
+        return self.cascade.config["cheap_model"] if tier == "cheap" else self.config["openai_model"]
+
+    def _summarize(self, scraped_data: ScrapedData) -> dict[str, str]:
+        """
+        Summarizes the given scraped data. With a cascade configured, short articles are summarized
+        locally or by the cheap model, and only long, code-heavy or low-confidence ones reach `openai_model`.
+        :param scraped_data: The data obtained from scraping.
+        :return: Mapping of language to summarized text.
+        """
+        if self.cascade is None:
+            texts, _ = self._request(scraped_data)
+            return texts
+        languages = self._languages()
+        content = scraped_data["content"]
+        tier = self.cascade.route(content, allow_extractive=len(languages) == 1)
+        if tier == "extractive":
+            logger.debug("Extractive summary: %s", scraped_data["link"])
+            return {languages[0]: self.cascade.extract(content)}
+        if tier == "cheap":
+            texts, confidence = self._request(scraped_data, self.cascade.config["cheap_model"], rated=True)
+            if not self.cascade.should_escalate(texts, languages, confidence):
+                return texts
+            logger.debug("Escalating (confidence: %s): %s", confidence, scraped_data["link"])
+            if self.budget is not None:
+                self.budget.charge(self.budget.estimate_tokens(content), self.config["openai_model"])
+        texts, _ = self._request(scraped_data)
+        return texts
+
+    def _summarize_cluster(self, cluster: list[ScrapedData]) -> tuple[dict[int, str], str]:
         """
-        data: list[SummarizedData] = []
-        for scraped_data in scraped_data_list:
+        Summarizes related articles with a single LLM call.
+        :param cluster: Related articles.
+        :return: Mapping of article number (1-based) to summarized text, and the combined summary.
+        """
+        system_content = str(self.config["prompt"].format(language=self._languages()[0])) + CLUSTER_INSTRUCTION
+        content = "\n\n".join(
+            f"[Article {i}] {scraped_data['title']}\n{scraped_data['content']}" for i, scraped_data in enumerate(cluster, 1)
+        )
+        res = self._invoke(system_content, content, ClusterOutputText)
+        texts = {summary.article: summary.summarized_text for summary in res.summaries if 1 <= summary.article <= len(cluster)}
+        return texts, res.combined_summary
+
+    def iter_run_clusters(
+        self,
+        clusters: Iterable[list[ScrapedData]],
+        release_content: bool = False,
+        failed: list[ScrapedData] | None = None,
+    ) -> Iterator[SummarizedData]:
+        """
+        Lazily summarizes clusters of related articles, one LLM call per cluster.
+        Single-article clusters, multi-language runs and cluster calls over the token limit fall back to
+        per-article summaries.
+        :param clusters: Clusters of scraped data.
+        :param release_content: Drops the article body from each record once its summary is produced.
+        :param failed: Receives the articles whose LLM request failed, such as on a timeout or rate limit.
+        :return: Iterator of summarized data with texts.
+        """
+        single_language = len(self._languages()) == 1
+        for cluster_id, cluster in enumerate(clusters):
+            if len(cluster) == 1 or not single_language:
+                yield from self.iter_run(cluster, release_content, failed)
+                continue
             try:
+                texts, combined_summary = self._summarize_cluster(cluster)
+            except openai.LengthFinishReasonError as e:
+                logger.warning(f"Token limit exceeded. Summarizing articles separately.\n{e}")
+                yield from self.iter_run(cluster, release_content, failed)
+                continue
+            except openai.APIError as e:
+                logger.error(f"Failed to summarize a cluster of {len(cluster)} articles.\n{e}")
+                if failed is not None:
+                    failed.extend(cluster)
+                continue
+            for i, scraped_data in enumerate(cluster, 1):
+                if i not in texts:
+                    yield from self.iter_run([scraped_data], release_content, failed)
+                    continue
                 record: SummarizedData = {
                     **scraped_data,  # type:ignore
-                    "summarized_text": self._summarize(scraped_data),
+                    "summarized_text": texts[i],
+                    "cluster_id": cluster_id,
+                    "cluster_summary": combined_summary,
                 }
-                data.append(record)
+                if release_content:
+                    record.pop("content", None)
+                yield record
+
+    def iter_run(
+        self,
+        scraped_data_iter: Iterable[ScrapedData],
+        release_content: bool = False,
+        failed: list[ScrapedData] | None = None,
+    ) -> Iterator[SummarizedData]:
+        """
+        Lazily summarizes scraped data, yielding one summarized record at a time.
+        :param scraped_data_iter: Iterable of scraped data.
+        :param release_content: Drops the article body from each record once its summary is produced.
+        :param failed: Receives the articles whose LLM request failed, such as on a timeout or rate limit.
+        :return: Iterator of summarized data with texts.
+        """
+        languages = self._languages()
+        for scraped_data in scraped_data_iter:
+            try:
+                texts = self._summarize(scraped_data)
             except openai.LengthFinishReasonError as e:
                 logger.warning(f"Token limit exceeded. Skipping.\n{e}")
-        return data
+                continue
+            except openai.APIError as e:
+                logger.error(f"Failed to summarize {scraped_data['link']}.\n{e}")
+                if failed is not None:
+                    failed.append(scraped_data)
+                continue
+            if languages[0] not in texts:
+                continue
+            record: SummarizedData = {
+                **scraped_data,  # type:ignore
+                "summarized_text": texts[languages[0]],
+            }
+            if len(languages) > 1:
+                record["summarized_texts"] = texts
+            if release_content:
+                record.pop("content", None)
+            yield record
+
+    def run(self, scraped_data_list: ScrapedData) -> list[SummarizedData]:
+        """
+        Summarizes a list of scraped data and returns the results.
+        :param scraped_data_list: List of scraped data.
+        :return: List of summarized data with texts.
+        """
+        return list(self.iter_run(scraped_data_list))  # type:ignore
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Literal, TypedDict
+from typing import Literal, NotRequired, TypedDict
 
 import polars as pl
 
@@ -13,15 +13,101 @@ class QiitaConfig(TypedDict):
     feeds: list[str]
 
 
+class CascadeConfig(TypedDict):
+    cheap_model: str
+    extractive_max_chars: NotRequired[int]
+    extractive_summary_chars: NotRequired[int]
+    cheap_max_chars: NotRequired[int]
+    max_code_ratio: NotRequired[float]
+    min_summary_chars: NotRequired[int]
+    min_confidence: NotRequired[float]
+
+
 class LLMConfig(TypedDict):
     openai_model: str
     language: str
+    languages: NotRequired[list[str]]
     temperature: float
     prompt: str
+    cascade: NotRequired[CascadeConfig]
 
 
-class DiscordConfig(TypedDict):
+class SubscriptionConfig(TypedDict):
     webhook_url: str
+    tags: NotRequired[list[str]]
+    sources: NotRequired[list[Literal["zenn", "qiita"]]]
+    language: NotRequired[str]
+
+
+class DiscordConfig(TypedDict):
+    webhook_url: NotRequired[str]
+    subscriptions: NotRequired[list[SubscriptionConfig]]
+
+
+class RankingConfig(TypedDict):
+    tag_weights: NotRequired[dict[str, float]]
+    source_weights: NotRequired[dict[str, float]]
+    recency_weight: NotRequired[float]
+    recency_half_life_hours: NotRequired[float]
+    length_weight: NotRequired[float]
+
+
+class BudgetConfig(TypedDict):
+    max_tokens: NotRequired[int]
+    max_cost: NotRequired[float]
+    max_seconds: NotRequired[float]
+    cost_per_million_tokens: NotRequired[float]
+    model_costs: NotRequired[dict[str, float]]
+    chars_per_token: NotRequired[float]
+    output_tokens: NotRequired[int]
+    max_defer_hours: NotRequired[float]
+
+
+class ClusterConfig(TypedDict):
+    similarity_threshold: NotRequired[float]
+    max_cluster_size: NotRequired[int]
+    max_chars: NotRequired[int]
+    tag_weight: NotRequired[int]
+    combined_post: NotRequired[bool]
+
+
+class DistributedConfig(TypedDict):
+    queue_path: str
+    lease_seconds: NotRequired[float]
+    cycle_seconds: NotRequired[int]
+    max_attempts: NotRequired[int]
+    retention_cycles: NotRequired[int]
+
+
+class DeadlineConfig(TypedDict):
+    total_seconds: NotRequired[float]
+    feeds_seconds: NotRequired[float]
+    process_seconds: NotRequired[float]
+    request_timeout: NotRequired[float]
+
+
+class ApiConfig(TypedDict):
+    qiita_base_url: NotRequired[str]
+    zenn_base_url: NotRequired[str]
+    qiita_token: NotRequired[str]
+    per_page: NotRequired[int]
+    max_pages: NotRequired[int]
+    max_kept_bodies: NotRequired[int]
+
+
+class PollingConfig(TypedDict):
+    min_interval_hours: NotRequired[float]
+    max_interval_hours: NotRequired[float]
+    target_entries_per_poll: NotRequired[float]
+    smoothing: NotRequired[float]
+
+
+class ImageConfig(TypedDict):
+    max_bytes: NotRequired[int]
+    content_types: NotRequired[list[str]]
+    ttl_hours: NotRequired[float]
+    concurrency: NotRequired[int]
+    fallback_url: NotRequired[str]
 
 
 class AppConfig(TypedDict):
@@ -30,6 +116,18 @@ class AppConfig(TypedDict):
     qiita: QiitaConfig
     llm: LLMConfig
     discord: DiscordConfig
+    max_in_flight: NotRequired[int]
+    state_path: NotRequired[str]
+    parse_workers: NotRequired[int]
+    ranking: NotRequired[RankingConfig]
+    budget: NotRequired[BudgetConfig]
+    cluster: NotRequired[ClusterConfig]
+    distributed: NotRequired[DistributedConfig]
+    deadline: NotRequired[DeadlineConfig]
+    lock_path: NotRequired[str]
+    api: NotRequired[ApiConfig]
+    polling: NotRequired[PollingConfig]
+    images: NotRequired[ImageConfig]
 
 
 # Data Structure
@@ -65,15 +163,23 @@ class ScrapedData(TypedDict):
 
 
 class SummarizedData(TypedDict):
+    """
+    Represents a summarized entry. The article body is optional so that
+    streaming runs can release it once the summary has been produced.
+    """
+
     title: str
     link: str
     published: datetime
     source: Literal["zenn", "qiita"]
     tags: list[str]
     image_url: str | None
-    content: str
+    content: NotRequired[str]
     author: str
     summarized_text: str
+    summarized_texts: NotRequired[dict[str, str]]
+    cluster_id: NotRequired[int]
+    cluster_summary: NotRequired[str]
 
 
 # Polars Schema
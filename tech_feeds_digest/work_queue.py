@@ -0,0 +1,294 @@
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Literal, TypedDict
+
+logger = getLogger(__name__)
+
+ItemKind = Literal["feed", "article"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    finished_at REAL,
+    UNIQUE (kind, key)
+);
+CREATE INDEX IF NOT EXISTS items_claim ON items (kind, status, lease_expires);
+"""
+
+
+class WorkItem(TypedDict):
+    id: int
+    kind: ItemKind
+    key: str
+    payload: dict[str, Any]
+
+
+class SQLiteWorkQueue:
+    """
+    Work queue shared by several workers through a SQLite database.
+
+    Items are unique per (kind, key), so an article enqueued by any worker is never enqueued again.
+    Workers claim items with a lease that they keep alive with heartbeats; items whose lease
+    expired are handed to another worker. Items move through
+    pending -> leased -> delivering -> done, and an item in `delivering` is never handed out again,
+    so each article is posted at most once even if its worker dies.
+    Finished (done or failed) items are kept until `prune` removes them, so they are not enqueued again
+    while their feed can still return them.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 3,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initializes the queue and creates the database if needed.
+
+        Args:
+            path (str | Path): Path of the SQLite database file.
+            lease_seconds (float): Duration of a lease before the item can be claimed by another worker.
+            max_attempts (int): Number of claims after which an item is marked as failed.
+            clock (Callable[[], float]): Wall clock in seconds, shared by all workers.
+        """
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30.0)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(items)")]
+            if "finished_at" not in columns:
+                # Queues created before pruning existed: their finished items start aging now
+                conn.execute("ALTER TABLE items ADD COLUMN finished_at REAL")
+                conn.execute(
+                    "UPDATE items SET finished_at = ? WHERE status IN ('done', 'failed')",
+                    (self.clock(),),
+                )
+                conn.commit()
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Opens a connection for one transaction. Connections are not shared between threads.
+
+        Yields:
+            sqlite3.Connection: Connection with an open transaction that is committed on success.
+        """
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def enqueue(self, kind: ItemKind, key: str, payload: dict[str, Any]) -> bool:
+        """
+        Adds an item unless an item of the same kind and key was ever added.
+
+        Args:
+            kind (ItemKind): Kind of the item.
+            key (str): Deduplication key, such as the article link.
+            payload (dict[str, Any]): JSON-serializable payload.
+
+        Returns:
+            bool: True if the item was added.
+        """
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO items (kind, key, payload) VALUES (?, ?, ?)",
+                (kind, key, json.dumps(payload, ensure_ascii=False, default=str)),
+            )
+            return cur.rowcount == 1
+
+    def claim(self, kind: ItemKind, owner: str, limit: int = 1) -> list[WorkItem]:
+        """
+        Leases pending items, or items whose lease expired, to the given worker.
+
+        Args:
+            kind (ItemKind): Kind of the items to claim.
+            owner (str): Worker ID.
+            limit (int): Maximum number of items to claim.
+
+        Returns:
+            list[WorkItem]: Claimed items.
+        """
+        now = self.clock()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE items SET status = 'failed', owner = NULL, finished_at = ? WHERE kind = ? AND attempts >= ? "
+                "AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?))",
+                (now, kind, self.max_attempts, now),
+            )
+            rows = conn.execute(
+                "SELECT id, key, payload FROM items WHERE kind = ? "
+                "AND (status = 'pending' OR (status = 'leased' AND lease_expires < ?)) ORDER BY id LIMIT ?",
+                (kind, now, limit),
+            ).fetchall()
+            for item_id, _, _ in rows:
+                conn.execute(
+                    "UPDATE items SET status = 'leased', owner = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                    (owner, now + self.lease_seconds, item_id),
+                )
+        return [{"id": item_id, "kind": kind, "key": key, "payload": json.loads(payload)} for item_id, key, payload in rows]
+
+    def heartbeat(self, item_ids: list[int], owner: str) -> int:
+        """
+        Extends the leases the given worker still holds.
+
+        Args:
+            item_ids (list[int]): IDs of the items.
+            owner (str): Worker ID.
+
+        Returns:
+            int: Number of leases extended.
+        """
+        if not item_ids:
+            return 0
+        placeholders = ", ".join("?" * len(item_ids))
+        with self._connect() as conn:
+            cur = conn.execute(
+                f"UPDATE items SET lease_expires = ? WHERE owner = ? AND status = 'leased' AND id IN ({placeholders})",
+                (self.clock() + self.lease_seconds, owner, *item_ids),
+            )
+            return cur.rowcount
+
+    def _transition(self, item_id: int, owner: str, from_status: str, to_status: str) -> bool:
+        """
+        Moves an item held by the given worker from one status to another.
+
+        Args:
+            item_id (int): ID of the item.
+            owner (str): Worker ID.
+            from_status (str): Expected current status.
+            to_status (str): New status.
+
+        Returns:
+            bool: True if the worker still held the item and it was moved.
+        """
+        finished_at = self.clock() if to_status == "done" else None
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE items SET status = ?, finished_at = ? WHERE id = ? AND owner = ? AND status = ?",
+                (to_status, finished_at, item_id, owner, from_status),
+            )
+            return cur.rowcount == 1
+
+    def start_delivery(self, item_id: int, owner: str) -> bool:
+        """
+        Marks a leased item as being delivered. Fails if the lease was lost to another worker,
+        in which case the caller must not deliver it.
+
+        Args:
+            item_id (int): ID of the item.
+            owner (str): Worker ID.
+
+        Returns:
+            bool: True if the caller may deliver the item.
+        """
+        return self._transition(item_id, owner, "leased", "delivering")
+
+    def complete(self, item_id: int, owner: str) -> bool:
+        """
+        Marks an item as done.
+
+        Args:
+            item_id (int): ID of the item.
+            owner (str): Worker ID.
+
+        Returns:
+            bool: True if the worker still held the item.
+        """
+        return self._transition(item_id, owner, "leased", "done") or self._transition(item_id, owner, "delivering", "done")
+
+    def release(self, item_id: int, owner: str) -> bool:
+        """
+        Returns a leased item to the queue so it can be retried.
+
+        Args:
+            item_id (int): ID of the item.
+            owner (str): Worker ID.
+
+        Returns:
+            bool: True if the worker still held the item.
+        """
+        return self._transition(item_id, owner, "leased", "pending")
+
+    def prune(self, max_age: float) -> int:
+        """
+        Deletes the items that finished more than `max_age` seconds ago. A pruned article can be enqueued again,
+        so `max_age` must exceed the time its feed keeps returning it.
+
+        Args:
+            max_age (float): Age in seconds after which finished items are deleted.
+
+        Returns:
+            int: Number of items deleted.
+        """
+        with self._connect() as conn:
+            cur = conn.execute(
+                "DELETE FROM items WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (self.clock() - max_age,),
+            )
+            return cur.rowcount
+
+
+class Heartbeat:
+    """
+    Background thread that keeps the leases of claimed items alive while they are being processed.
+    """
+
+    def __init__(self, queue: SQLiteWorkQueue, owner: str, item_ids: list[int], interval: float | None = None):
+        """
+        Initializes the heartbeat.
+
+        Args:
+            queue (SQLiteWorkQueue): The work queue.
+            owner (str): Worker ID.
+            item_ids (list[int]): IDs of the items to keep alive.
+            interval (float | None): Seconds between heartbeats. Defaults to a third of the lease.
+        """
+        self.queue = queue
+        self.owner = owner
+        self.item_ids = item_ids
+        self.interval = interval if interval is not None else queue.lease_seconds / 3
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.queue.heartbeat(self.item_ids, self.owner)
+            except sqlite3.Error as e:
+                logger.warning("Heartbeat failed: %s", e)
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        self._thread.join()
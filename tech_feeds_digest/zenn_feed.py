@@ -1,11 +1,19 @@
+from collections.abc import Iterable
+from concurrent.futures import Executor
 from datetime import datetime, timedelta
+from logging import getLogger
 
-import feedparser
+import httpx
 import polars as pl
 import pytz
 
+from .deadline import Deadline
+from .feed_parser import FeedEntry, FeedParser
+from .state import State
 from .types import FeedData, ZennConfig, expected_schema
 
+logger = getLogger(__name__)
+
 run_time = datetime.now(pytz.timezone("Asia/Tokyo"))
 
 
@@ -31,48 +39,106 @@ class ZennFeed:
         return naive_dt.astimezone(target_tz)
 
     @staticmethod
-    def _parse(url: str, lookback_hours: int) -> pl.DataFrame:
+    def _parse(
+        url: str,
+        lookback_hours: float,
+        state: State | None = None,
+        entries: Iterable[FeedEntry] | None = None,
+        timeout: float = FeedParser.TIMEOUT,
+    ) -> pl.DataFrame:
         """
         Parses the Zenn feed at the given URL and filters articles within the lookback period.
+        Entries are read newest-first and parsing stops at the first entry that is outside the
+        lookback period or was already seen in a previous run.
 
         Args:
             url (str): The feed URL.
-            lookback_hours (int): The number of hours to look back.
+            lookback_hours (float): The number of hours to look back.
+            state (State | None): State holding the high-water mark of each feed.
+            entries (Iterable[FeedEntry] | None): Entries already parsed. The URL is fetched and streamed when None.
+            timeout (float): Timeout of the request in seconds.
 
         Returns:
             pl.DataFrame: DataFrame containing filtered articles.
         """
+        cutoff = run_time - timedelta(hours=lookback_hours + 24)
+        seen_published, seen_link = state.get_high_water_mark(url) if state is not None else (None, None)
         data: list[FeedData] = []
-        f = feedparser.parse(url)
-        for entry in f.get("entries", []):
+        if entries is None:
+            entries = FeedParser.iter_entries(FeedParser.fetch(url, timeout))
+        for entry in entries:
+            link = entry["link"]
+            if seen_link is not None and link == seen_link:
+                break
+            published = ZennFeed._convert_jst_dt_obj(entry["published"])
+            if published <= cutoff:
+                break
+            if seen_published is not None and published < seen_published:
+                break
             feed_data: FeedData = {
-                "title": entry.get("title"),
-                "link": entry.get("link"),
-                "published": ZennFeed._convert_jst_dt_obj(entry.get("published")),
+                "title": entry["title"],
+                "link": link,
+                "published": published,
                 "source": "zenn",
             }
             data.append(feed_data)
-        df = pl.DataFrame(data, schema=expected_schema)
-        if df.is_empty():
-            return df
-        return df.filter(pl.col("published") > (run_time - timedelta(hours=lookback_hours + 24)))
+        if state is not None and data:
+            state.set_high_water_mark(url, data[0]["published"], data[0]["link"])
+        return pl.DataFrame(data, schema=expected_schema)
 
     @staticmethod
-    def run(lookback_hours: int, config: ZennConfig) -> pl.DataFrame:
+    def run(
+        lookback_hours: int,
+        config: ZennConfig,
+        state: State | None = None,
+        executor: Executor | None = None,
+        deadline: Deadline | None = None,
+        timeout: float = FeedParser.TIMEOUT,
+        lookbacks: dict[str, float] | None = None,
+        counts: dict[str, int] | None = None,
+    ) -> pl.DataFrame:
         """
 
         Args:
             lookback_hours (int): The number of hours to look back.
             config (ZennConfig): Configuration dictionary containing feed URLs.
+            state (State | None): State holding the high-water mark of each feed.
+            executor (Executor | None): Executor to fetch and parse the feeds on, such as a ProcessPoolExecutor.
+            deadline (Deadline | None): Feeds not read by this deadline are skipped and keep their high-water mark.
+                Feeds that fail to be fetched or parsed are skipped in the same way.
+            timeout (float): Timeout of each request in seconds.
+            lookbacks (dict[str, float] | None): Lookback hours of each feed, overriding `lookback_hours`.
+            counts (dict[str, int] | None): Receives the number of new entries found on each feed that was read.
 
         Returns:
             pl.DataFrame: DataFrame of retrieved articles.
         """
         df = pl.DataFrame([], schema=expected_schema)
-        for feed_url in config["feeds"]:
-            cdf = ZennFeed._parse(feed_url, lookback_hours)
+        futures = (
+            [executor.submit(FeedParser.parse_url, feed_url, timeout) for feed_url in config["feeds"]]
+            if executor is not None
+            else []
+        )
+        for i, feed_url in enumerate(config["feeds"]):
+            if deadline is not None and deadline.expired():
+                logger.warning("Deadline reached. Skipping %d feeds.", len(config["feeds"]) - i)
+                break
+            hours = lookbacks.get(feed_url, lookback_hours) if lookbacks is not None else lookback_hours
+            try:
+                entries = futures[i].result(deadline.remaining() if deadline is not None else None) if futures else None
+                cdf = ZennFeed._parse(feed_url, hours, state, entries, timeout)
+            except TimeoutError:
+                logger.warning("Deadline reached. Skipping %d feeds.", len(config["feeds"]) - i)
+                break
+            except (httpx.HTTPError, ValueError) as e:
+                logger.warning("Failed to parse feed %s: %s", feed_url, e)
+                continue
+            if counts is not None:
+                counts[feed_url] = cdf.shape[0]
             if cdf.is_empty():
                 continue
             df = pl.concat([df, cdf])
+        for future in futures:
+            future.cancel()
         df = df.unique()
         return df
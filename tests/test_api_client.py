@@ -0,0 +1,140 @@
+import json
+import pathlib
+import sys
+import threading
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import pytz
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.api_client import ApiClient
+from tech_feeds_digest.state import State
+
+NOW = datetime.now(pytz.timezone("Asia/Tokyo"))
+
+
+def qiita_item(i: int, hours_ago: float) -> dict:
+    return {
+        "title": f"qiita {i}",
+        "url": f"https://qiita.com/user/items/q{i}",
+        "created_at": (NOW - timedelta(hours=hours_ago)).isoformat(),
+        "body": f"# body {i}",
+        "tags": [{"name": "python"}, {"name": "rust"}],
+        "user": {"id": "user"},
+    }
+
+
+def zenn_article(i: int, hours_ago: float) -> dict:
+    return {
+        "title": f"zenn {i}",
+        "slug": f"z{i}",
+        "path": f"/author/articles/z{i}",
+        "published_at": (NOW - timedelta(hours=hours_ago)).isoformat(),
+    }
+
+
+QIITA_ITEMS = [qiita_item(1, 1), qiita_item(2, 2), qiita_item(3, 30)]
+ZENN_PAGES = {"1": [zenn_article(1, 1)], "2": [zenn_article(2, 3), zenn_article(3, 40)]}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests: list[str] = []
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        StubHandler.requests.append(url.path)
+        body: object
+        if url.path == "/qiita/items":
+            per_page = int(query["per_page"])
+            page = int(query["page"])
+            body = QIITA_ITEMS[(page - 1) * per_page : page * per_page]
+        elif url.path.startswith("/qiita/items/"):
+            body = qiita_item(int(url.path.rsplit("/q", 1)[1]), 5)
+        elif url.path == "/zenn/articles":
+            assert query["topicname"] == "rust"
+            body = {"articles": ZENN_PAGES[query["page"]], "next_page": 2 if query["page"] == "1" else None}
+        elif url.path.startswith("/zenn/articles/"):
+            slug = url.path.rsplit("/", 1)[1]
+            body = {
+                "article": {
+                    "body_html": f"<h1>Title</h1><p>body of {slug}</p>",
+                    "og_image_url": f"https://example.com/{slug}.png",
+                    "topics": [{"name": "rust", "display_name": "Rust"}],
+                    "user": {"name": "Author", "username": "author"},
+                }
+            }
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def client() -> Iterator[ApiClient]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    StubHandler.requests = []
+    api = ApiClient({"qiita_base_url": f"{base_url}/qiita", "zenn_base_url": f"{base_url}/zenn", "per_page": 2})
+    yield api
+    api.close()
+    server.shutdown()
+
+
+def test_run_lists_both_sites_within_lookback(client: ApiClient):
+    state = State()
+    df = client.run(
+        24,
+        {"feeds": ["https://zenn.dev/topics/rust/feed"]},
+        {"feeds": ["https://qiita.com/tags/python/feed", "https://qiita.com/user/feed"]},
+        state,
+    )
+    assert sorted(df["title"].to_list()) == ["qiita 1", "qiita 2", "zenn 1", "zenn 2"]
+    assert StubHandler.requests == ["/qiita/items", "/qiita/items", "/zenn/articles", "/zenn/articles"]
+    state.commit()
+    assert state.get_high_water_mark("https://zenn.dev/topics/rust/feed")[1] == "https://zenn.dev/author/articles/z1"
+    # The next run stops at the high-water mark
+    assert client.run(24, {"feeds": ["https://zenn.dev/topics/rust/feed"]}, {"feeds": []}, state).is_empty()
+
+
+def test_iter_run_fetches_only_articles_without_a_listed_body(client: ApiClient):
+    df = client.run(24, {"feeds": ["https://zenn.dev/topics/rust/feed"]}, {"feeds": ["https://qiita.com/tags/python/feed"]})
+    StubHandler.requests = []
+    deferred = {"title": "qiita 9", "link": "https://qiita.com/user/items/q9", "published": NOW, "source": "qiita"}
+    records = {r["link"]: r for r in client.iter_run([*df.iter_rows(named=True), deferred])}  # type:ignore
+    # The Qiita bodies come with the listing; only the Zenn articles and the deferred item are fetched
+    assert StubHandler.requests == ["/zenn/articles/z1", "/zenn/articles/z2", "/qiita/items/q9"]
+    assert client.contents == {}
+    assert records["https://qiita.com/user/items/q1"]["content"] == "# body 1"
+    assert records["https://qiita.com/user/items/q1"]["author"] == "user"
+    assert records["https://qiita.com/user/items/q9"]["tags"] == ["python", "rust"]
+    zenn = records["https://zenn.dev/author/articles/z1"]
+    assert zenn["content"] == "Titlebody of z1"
+    assert zenn["tags"] == ["Rust"]
+    assert zenn["author"] == "Author"
+    assert zenn["image_url"] == "https://example.com/z1.png"
+
+
+def test_kept_bodies_are_bounded(client: ApiClient):
+    client.max_kept_bodies = 1
+    df = client.run(24, {"feeds": []}, {"feeds": ["https://qiita.com/tags/python/feed"]})
+    assert list(client.contents) == ["https://qiita.com/user/items/q1"]
+    StubHandler.requests = []
+    records = list(client.iter_run(df.iter_rows(named=True)))  # type:ignore
+    assert StubHandler.requests == ["/qiita/items/q2"]
+    assert [r["content"] for r in records] == ["# body 1", "# body 2"]
@@ -0,0 +1,93 @@
+import pathlib
+import sys
+from datetime import datetime
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.budget import Budget
+from tech_feeds_digest.deadline import Deadline
+from tech_feeds_digest.types import ScrapedData
+
+
+def make_scraped(title: str, content: str) -> ScrapedData:
+    return {
+        "title": title,
+        "link": f"https://example.com/{title}",
+        "published": datetime.now(),
+        "source": "zenn",
+        "tags": [],
+        "image_url": None,
+        "content": content,
+        "author": "author",
+    }
+
+
+def test_unbounded_budget_takes_everything():
+    budget = Budget({})
+    deferred: list[ScrapedData] = []
+    taken = list(budget.take([make_scraped("a", "x" * 100), make_scraped("b", "x" * 100)], deferred))
+    assert len(taken) == 2
+    assert deferred == []
+
+
+def test_token_budget_defers_and_skips_to_smaller():
+    budget = Budget({"max_tokens": 1000, "output_tokens": 0})
+    deferred: list[ScrapedData] = []
+    articles = [make_scraped("a", "x" * 600), make_scraped("b", "x" * 600), make_scraped("c", "x" * 300)]
+    taken = list(budget.take(articles, deferred))
+    assert [t["title"] for t in taken] == ["a", "c"]
+    assert [d["title"] for d in deferred] == ["b"]
+    assert budget.used_tokens == 900
+
+
+def test_cost_budget():
+    budget = Budget({"max_cost": 0.001, "cost_per_million_tokens": 1000.0, "output_tokens": 0})
+    assert budget.try_reserve(1)
+    assert not budget.try_reserve(1)
+    assert budget.is_exhausted()
+
+
+def test_time_budget_is_checked_when_pulled():
+    now = [0.0]
+    budget = Budget({"max_seconds": 10}, clock=lambda: now[0])
+    deferred: list[ScrapedData] = []
+    taken = []
+    for article in budget.take([make_scraped("a", ""), make_scraped("b", "")], deferred):
+        taken.append(article)
+        now[0] += 11
+    assert [t["title"] for t in taken] == ["a"]
+    assert [d["title"] for d in deferred] == ["b"]
+
+
+def test_expired_deadline_exhausts_budget():
+    now = [0.0]
+    deadline = Deadline(10, lambda: now[0])
+    budget = Budget({}, deadline=deadline)
+    deferred: list[ScrapedData] = []
+    articles = iter([make_scraped("a", "x"), make_scraped("b", "x")])
+    taken = budget.take(articles, deferred)
+    assert next(taken)["title"] == "a"
+    now[0] = 10.0
+    assert list(taken) == []
+    assert [d["title"] for d in deferred] == ["b"]
+
+
+def test_route_prices_each_article_by_its_model():
+    budget = Budget({"max_cost": 0.0002, "cost_per_million_tokens": 1000.0, "model_costs": {"cheap": 1.0}, "output_tokens": 0})
+    routes = {"a": None, "b": "cheap", "c": "strong"}
+    deferred: list[ScrapedData] = []
+    articles = [make_scraped("a", "x" * 1000), make_scraped("b", "x" * 100), make_scraped("c", "x" * 100)]
+    taken = list(budget.take(articles, deferred, lambda s: routes[s["title"]]))
+    assert [t["title"] for t in taken] == ["a", "b"]
+    assert [d["title"] for d in deferred] == ["c"]
+    assert budget.used_tokens == 100
+    assert budget.estimate_cost(100, "cheap") == budget.used_cost
+
+
+def test_clusters_are_priced_by_the_cluster_model():
+    budget = Budget({"cost_per_million_tokens": 1.0, "model_costs": {"strong": 10.0, "cheap": 0.5}, "output_tokens": 0})
+    clusters = [[make_scraped("a", "x" * 100), make_scraped("b", "x" * 100)], [make_scraped("c", "x" * 100)]]
+    deferred: list[ScrapedData] = []
+    taken = list(budget.take_clusters(clusters, deferred, lambda s: "cheap", "strong"))
+    assert [[t["title"] for t in cluster] for cluster in taken] == [["a", "b"], ["c"]]
+    assert budget.used_cost == budget.estimate_cost(200, "strong") + budget.estimate_cost(100, "cheap")
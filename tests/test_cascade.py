@@ -0,0 +1,35 @@
+import pathlib
+import sys
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.cascade import Cascade
+
+
+def test_route():
+    cascade = Cascade({"cheap_model": "cheap", "extractive_max_chars": 100, "cheap_max_chars": 1000})
+    assert cascade.route("短い記事です。") == "extractive"
+    assert cascade.route("短い記事です。", allow_extractive=False) == "cheap"
+    assert cascade.route("あ" * 500) == "cheap"
+    assert cascade.route("あ" * 1001) == "strong"
+    assert cascade.route("説明" * 60 + "```python\n" + "x = f(y)\n" * 30 + "```") == "strong"
+
+
+def test_code_ratio_without_fences():
+    assert Cascade.code_ratio("") == 0.0
+    assert Cascade.code_ratio("これは普通の文章です。") == 0.0
+    assert Cascade.code_ratio('fn main(){let x=vec![1];println!("{}",x[0]);}') == 1.0
+
+
+def test_should_escalate():
+    cascade = Cascade({"cheap_model": "cheap", "min_summary_chars": 5, "min_confidence": 0.5})
+    assert not cascade.should_escalate({"Japanese": "十分な長さの要約"}, ["Japanese"], 0.9)
+    assert cascade.should_escalate({"Japanese": "短い"}, ["Japanese"], 0.9)
+    assert cascade.should_escalate({"Japanese": "十分な長さの要約"}, ["Japanese"], 0.1)
+    assert cascade.should_escalate({"Japanese": "十分な長さの要約"}, ["Japanese", "English"], 0.9)
+
+
+def test_extract_leading_sentences():
+    cascade = Cascade({"cheap_model": "cheap", "extractive_summary_chars": 12})
+    assert cascade.extract("一文目です。二文目です。三文目です。") == "一文目です。二文目です。"
+    assert cascade.extract("区切りのない長い文章" * 3) == ("区切りのない長い文章" * 3)[:12]
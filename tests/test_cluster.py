@@ -0,0 +1,60 @@
+import pathlib
+import sys
+from datetime import datetime
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.cluster import Clusterer
+from tech_feeds_digest.types import ScrapedData
+
+
+def make_scraped(title: str, content: str, tags: list[str]) -> ScrapedData:
+    return {
+        "title": title,
+        "link": f"https://example.com/{title}",
+        "published": datetime.now(),
+        "source": "zenn",
+        "tags": tags,
+        "image_url": None,
+        "content": content,
+        "author": "author",
+    }
+
+
+ARTICLES = [
+    make_scraped("Claude CodeでMCPサーバーを作る", "MCPサーバーをClaude Codeから使う方法を紹介します。", ["mcp", "claude"]),
+    make_scraped("Rustの所有権を理解する", "Rustの所有権と借用について解説します。ライフタイムも扱います。", ["rust"]),
+    make_scraped("MCPサーバー入門", "Model Context Protocol (MCP) サーバーの作り方。Claudeから呼び出します。", ["mcp"]),
+    make_scraped("Flutterで状態管理", "RiverpodでFlutterアプリの状態管理をする方法です。", ["flutter"]),
+    make_scraped("Rustのライフタイム", "借用チェッカーとライフタイム注釈の書き方をRustで。", ["rust"]),
+]
+
+
+def titles(clusters: list[list[ScrapedData]]) -> list[list[str]]:
+    return [[a["title"] for a in cluster] for cluster in clusters]
+
+
+def test_cluster_groups_related_articles_in_priority_order():
+    clusters = Clusterer({}).cluster(ARTICLES)
+    assert titles(clusters) == [
+        ["Claude CodeでMCPサーバーを作る", "MCPサーバー入門"],
+        ["Rustの所有権を理解する", "Rustのライフタイム"],
+        ["Flutterで状態管理"],
+    ]
+
+
+def test_cluster_respects_max_size_and_threshold():
+    assert all(len(c) == 1 for c in Clusterer({"max_cluster_size": 1}).cluster(ARTICLES))
+    assert all(len(c) == 1 for c in Clusterer({"similarity_threshold": 0.99}).cluster(ARTICLES))
+
+
+def test_similarities_are_symmetric_cosines():
+    sims = Clusterer({}).similarities(ARTICLES)
+    assert (sims["doc"] < sims["doc_right"]).all()
+    assert (sims["similarity"] <= 1.0 + 1e-9).all()
+    assert sims.row(0)[:2] == (0, 2)
+
+
+def test_cluster_small_inputs():
+    assert Clusterer({}).cluster([]) == []
+    assert titles(Clusterer({}).cluster(ARTICLES[:1])) == [["Claude CodeでMCPサーバーを作る"]]
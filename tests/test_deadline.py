@@ -0,0 +1,41 @@
+import pathlib
+import sys
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.deadline import Deadline
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_unlimited_deadline_never_expires():
+    clock = FakeClock()
+    deadline = Deadline(None, clock)
+    clock.now = 1e9
+    assert deadline.remaining() is None
+    assert not deadline.expired()
+
+
+def test_deadline_expires():
+    clock = FakeClock()
+    deadline = Deadline(10, clock)
+    clock.now = 4
+    assert deadline.remaining() == 6
+    clock.now = 12
+    assert deadline.remaining() == 0.0
+    assert deadline.expired()
+
+
+def test_child_is_bounded_by_parent():
+    clock = FakeClock()
+    deadline = Deadline(10, clock)
+    assert deadline.child(5).remaining() == 5
+    assert deadline.child(30).remaining() == 10
+    assert deadline.child(None).remaining() == 10
+    assert Deadline(None, clock).child(5).remaining() == 5
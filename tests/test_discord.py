@@ -0,0 +1,117 @@
+import asyncio
+import pathlib
+import sys
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.deadline import Deadline
+from tech_feeds_digest.discord import Discord
+from tech_feeds_digest.types import SummarizedData
+
+
+def make_message(link: str, tags: list[str], cluster_id: int | None = None) -> SummarizedData:
+    message: SummarizedData = {
+        "title": link,
+        "link": link,
+        "published": datetime.now(),
+        "source": "zenn",
+        "tags": tags,
+        "image_url": None,
+        "author": "author",
+        "summarized_text": "summary",
+    }
+    if cluster_id is not None:
+        message["cluster_id"] = cluster_id
+        message["cluster_summary"] = "topic"
+    return message
+
+
+def test_send_messages_combines_clusters_per_subscription():
+    d = Discord({"webhook_url": "all", "subscriptions": [{"webhook_url": "rust", "tags": ["rust"]}]})
+    messages = [
+        make_message("a", ["rust"], cluster_id=0),
+        make_message("b", ["go"], cluster_id=0),
+        make_message("c", ["rust"]),
+    ]
+    with (
+        patch.object(Discord, "send_message", new_callable=AsyncMock) as send_message,
+        patch.object(Discord, "send_combined_message", new_callable=AsyncMock) as send_combined,
+    ):
+        asyncio.run(d.send_messages(messages, combine_clusters=True))
+    assert [(c.args[0]["link"], c.args[1]) for c in send_message.call_args_list] == [("a", "rust"), ("c", "rust"), ("c", "all")]
+    assert [([m["link"] for m in c.args[0]], c.args[1]) for c in send_combined.call_args_list] == [(["a", "b"], "all")]
+
+
+def test_send_messages_without_combining():
+    d = Discord({"webhook_url": "all"})
+    messages = [make_message("a", [], cluster_id=0), make_message("b", [], cluster_id=0)]
+    with patch.object(Discord, "send_message", new_callable=AsyncMock) as send_message:
+        asyncio.run(d.send_messages(messages))
+    assert send_message.call_count == 2
+
+
+def test_build_embed_uses_subscription_language():
+    d = Discord({"webhook_url": "all"})
+    message = make_message("a", ["rust"])
+    message["summarized_texts"] = {"Japanese": "要約", "English": "summary in English"}
+    assert d._build_embed(message, "English").description == "summary in English"
+    assert d._build_embed(message).description == "summary"
+
+
+def test_send_messages_returns_unsent_after_deadline():
+    d = Discord({"webhook_url": "all"})
+    messages = [make_message("a", []), make_message("b", [])]
+    now = [0.0]
+    deadline = Deadline(10, lambda: now[0])
+
+    async def send_message(*args) -> bool:
+        now[0] = 10.0
+        return True
+
+    with patch.object(Discord, "send_message", side_effect=send_message):
+        unsent = asyncio.run(d.send_messages(messages, deadline=deadline))
+    assert [m["link"] for m in unsent] == ["b"]
+
+
+class FakeWebhook:
+    def __init__(self, fail_at: int | None = None):
+        self.fail_at = fail_at
+        self.posts: list[tuple[str, list]] = []
+
+    async def send(self, content: str = "", embeds: list | None = None, embed: object = None) -> None:
+        embeds = embeds if embed is None else [embed]
+        if len(self.posts) == self.fail_at:
+            self.posts.append((content, []))
+            raise RuntimeError("400 Bad Request")
+        self.posts.append((content, embeds or []))
+
+
+def test_send_combined_message_splits_large_clusters():
+    d = Discord({"webhook_url": "all"})
+    messages = [make_message(f"m{i}", [], cluster_id=0) for i in range(12)]
+    messages[10]["summarized_text"] = messages[11]["summarized_text"] = "x" * 4000
+    webhook = FakeWebhook()
+    with patch("discord.Webhook.from_url", return_value=webhook):
+        failed = asyncio.run(d.send_combined_message(messages, "all"))
+    assert failed == []
+    assert [len(embeds) for _, embeds in webhook.posts] == [10, 1, 1]
+    assert [content for content, _ in webhook.posts] == ["topic", "", ""]
+    assert all(sum(len(embed) for embed in embeds) <= Discord.MAX_EMBEDS_LENGTH for _, embeds in webhook.posts)
+
+
+def test_send_messages_returns_failed_combined_posts():
+    d = Discord({"webhook_url": "all"})
+    messages = [make_message(f"m{i}", [], cluster_id=0) for i in range(12)]
+    with patch("discord.Webhook.from_url", return_value=FakeWebhook(fail_at=1)):
+        unsent = asyncio.run(d.send_messages(messages, combine_clusters=True))
+    assert [m["link"] for m in unsent] == ["m10", "m11"]
+
+
+def test_send_messages_returns_failed_single_posts():
+    d = Discord({"webhook_url": "all"})
+    messages = [make_message("a", []), make_message("b", [])]
+    with patch("discord.Webhook.from_url", return_value=FakeWebhook(fail_at=0)):
+        unsent = asyncio.run(d.send_messages(messages))
+    assert [m["link"] for m in unsent] == ["a"]
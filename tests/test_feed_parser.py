@@ -0,0 +1,65 @@
+import pathlib
+import sys
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.feed_parser import FeedParser
+
+RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel>
+<title>Zenn</title>
+<item>
+<title><![CDATA[First & Foremost]]></title>
+<link>https://zenn.dev/a/articles/1</link>
+<pubDate>Tue, 24 Oct 2023 15:00:00 GMT</pubDate>
+<dc:creator>a</dc:creator>
+</item>
+<item>
+<title>Second</title>
+<link>https://zenn.dev/b/articles/2</link>
+<pubDate>Tue, 24 Oct 2023 14:00:00 GMT</pubDate>
+</item>
+</channel>
+</rss>
+"""
+
+ATOM = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+<title>Qiita</title>
+<link rel="self" href="https://qiita.com/tags/python/feed"/>
+<entry>
+<title>Qiita Entry</title>
+<link rel="self" href="https://qiita.com/self"/>
+<link rel="alternate" type="text/html" href="https://qiita.com/a/items/1"/>
+<published>2025-05-01T12:00:00+09:00</published>
+</entry>
+</feed>
+"""
+
+
+def test_iter_entries_rss():
+    entries = list(FeedParser.iter_entries(RSS))
+    assert entries == [
+        {"title": "First & Foremost", "link": "https://zenn.dev/a/articles/1", "published": "Tue, 24 Oct 2023 15:00:00 GMT"},
+        {"title": "Second", "link": "https://zenn.dev/b/articles/2", "published": "Tue, 24 Oct 2023 14:00:00 GMT"},
+    ]
+
+
+def test_iter_entries_atom_prefers_alternate_link():
+    entries = list(FeedParser.iter_entries(ATOM))
+    assert entries == [
+        {"title": "Qiita Entry", "link": "https://qiita.com/a/items/1", "published": "2025-05-01T12:00:00+09:00"},
+    ]
+
+
+def test_iter_entries_is_lazy():
+    it = FeedParser.iter_entries(RSS)
+    assert next(it)["title"] == "First & Foremost"
+
+
+def test_iter_entries_falls_back_on_malformed_input():
+    broken = RSS.replace(b"<title>Second</title>", b"<title>Second & Broken</title>")
+    entries = list(FeedParser.iter_entries(broken))
+    assert [e["link"] for e in entries] == ["https://zenn.dev/a/articles/1", "https://zenn.dev/b/articles/2"]
+    assert entries[1]["title"] == "Second & Broken"
@@ -0,0 +1,120 @@
+import asyncio
+import pathlib
+import sys
+import threading
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import pytz
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.image_validator import ImageValidator
+from tech_feeds_digest.state import State
+from tech_feeds_digest.types import SummarizedData
+
+IMAGES = {
+    "/ok.png": ("image/png", 1000),
+    "/big.png": ("image/png", 50 * 1024 * 1024),
+    "/page": ("text/html; charset=utf-8", 1000),
+    "/nohead.jpg": ("image/jpeg", 1000),
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests: list[tuple[str, str]] = []
+
+    def respond(self) -> None:
+        StubHandler.requests.append((self.command, self.path))
+        if self.path not in IMAGES:
+            self.send_error(404)
+            return
+        if self.path == "/nohead.jpg" and self.command == "HEAD":
+            self.send_error(405)
+            return
+        content_type, size = IMAGES[self.path]
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        if self.command == "GET":
+            self.wfile.write(b"x" * size)
+
+    do_HEAD = respond
+    do_GET = respond
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def base_url() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    StubHandler.requests = []
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def test_validate_all_checks_type_size_and_status(base_url: str):
+    validator = ImageValidator({}, State())
+    urls = [f"{base_url}{path}" for path in ["/ok.png", "/big.png", "/page", "/nohead.jpg", "/missing.png"]]
+    results = asyncio.run(validator.validate_all([*urls, urls[0], None]))
+    assert [results[url] for url in urls] == [True, False, False, True, False]
+    assert StubHandler.requests.count(("HEAD", "/ok.png")) == 1
+
+
+def test_validate_all_checks_urls_as_they_arrive(base_url: str):
+    validator = ImageValidator({}, State())
+
+    async def run() -> dict[str, bool]:
+        urls: asyncio.Queue[str | None] = asyncio.Queue()
+
+        async def arrive() -> AsyncIterator[str]:
+            while (url := await urls.get()) is not None:
+                yield url
+
+        task = asyncio.create_task(validator.validate_all(arrive()))
+        urls.put_nowait(f"{base_url}/ok.png")
+        # The first image is checked before the next URL arrives
+        while not StubHandler.requests:
+            await asyncio.sleep(0.01)
+        urls.put_nowait(f"{base_url}/page")
+        urls.put_nowait(None)
+        return await task
+
+    assert asyncio.run(run()) == {f"{base_url}/ok.png": True, f"{base_url}/page": False}
+
+
+def test_results_are_cached_until_ttl(base_url: str):
+    state = State()
+    validator = ImageValidator({"ttl_hours": 1}, state)
+    url = f"{base_url}/ok.png"
+    asyncio.run(validator.validate_all([url]))
+    assert asyncio.run(validator.validate_all([url])) == {url: True}
+    assert len(StubHandler.requests) == 1
+    state.set_image_check(url, True, datetime.now(pytz.UTC) - timedelta(hours=2))
+    asyncio.run(validator.validate_all([url]))
+    assert len(StubHandler.requests) == 2
+
+
+def test_apply_replaces_invalid_images():
+    validator = ImageValidator({"fallback_url": "https://example.com/default.png"}, State())
+    messages: list[SummarizedData] = [
+        {
+            "title": title,
+            "link": title,
+            "published": datetime.now(),
+            "source": "zenn",
+            "tags": [],
+            "image_url": image_url,
+            "author": "author",
+            "summarized_text": "summary",
+        }
+        for title, image_url in [("a", "good"), ("b", "bad"), ("c", None)]
+    ]
+    validator.apply(messages, {"good": True, "bad": False})
+    assert [m["image_url"] for m in messages] == ["good", "https://example.com/default.png", None]
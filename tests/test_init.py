@@ -1,13 +1,27 @@
+import asyncio
 import pathlib
 import sys
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
 
+import httpx
 import polars as pl
+import pytest
+import pytz
 
 sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
 
 
 from tech_feeds_digest import TechFeedsDigest
-from tech_feeds_digest.types import AppConfig
+from tech_feeds_digest.discord import Discord
+from tech_feeds_digest.feed_parser import FeedParser
+from tech_feeds_digest.image_validator import ImageValidator
+from tech_feeds_digest.ranker import Ranker
+from tech_feeds_digest.scraper import Scraper
+from tech_feeds_digest.state import State
+from tech_feeds_digest.summarizer import OutputText, Summarizer
+from tech_feeds_digest.types import AppConfig, ContentData, expected_schema
+from tech_feeds_digest.zenn_feed import ZennFeed
 
 
 def test_instantiate_tech_feeds_digest():
@@ -62,3 +76,327 @@ def test_get_feed_data_method_returns_dataframe():
     instance = TechFeedsDigest(config=config)
     df = instance._get_feed_data()
     assert hasattr(df, "filter")
+
+
+def test_iter_chunks_respects_max_in_flight():
+    config: AppConfig = {
+        "lookback_hours": 24,
+        "zenn": {"feeds": []},
+        "qiita": {"feeds": []},
+        "llm": {
+            "openai_model": "",
+            "language": "",
+            "temperature": 0.0,
+            "prompt": "",
+        },
+        "discord": {"webhook_url": ""},
+        "max_in_flight": 2,
+    }
+    instance = TechFeedsDigest(config=config)
+    df = pl.DataFrame({"title": ["A", "B", "C", "D", "E"], "link": ["a", "b", "c", "d", "e"]})
+    chunks = list(instance._iter_chunks(df))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert chunks[0][0]["title"] == "A"
+
+
+def test_iter_chunks_ranks_every_entry_first():
+    config: AppConfig = {
+        "lookback_hours": 24,
+        "zenn": {"feeds": []},
+        "qiita": {"feeds": []},
+        "llm": {
+            "openai_model": "",
+            "language": "",
+            "temperature": 0.0,
+            "prompt": "",
+        },
+        "discord": {"webhook_url": ""},
+        "max_in_flight": 2,
+    }
+    now = datetime.now(pytz.timezone("Asia/Tokyo"))
+    df = pl.DataFrame(
+        [{"title": t, "link": t, "published": now, "source": "zenn"} for t in ["go", "rust", "python", "mcp server"]],
+        schema=expected_schema,
+    )
+    ranker = Ranker({"tag_weights": {"mcp": 2.0, "rust": 1.0}}, now=now)
+    chunks = list(TechFeedsDigest(config=config)._iter_chunks(df, ranker))
+    assert [e["title"] for e in chunks[0]] == ["mcp server", "rust"]
+
+
+def test_run_worker_posts_each_article_once(tmp_path):
+    config: AppConfig = {
+        "lookback_hours": 24,
+        "zenn": {"feeds": ["https://zenn.dev/topics/a/feed", "https://zenn.dev/topics/b/feed"]},
+        "qiita": {"feeds": []},
+        "llm": {
+            "openai_model": "",
+            "language": "",
+            "temperature": 0.0,
+            "prompt": "",
+        },
+        "discord": {"webhook_url": "all"},
+        "distributed": {"queue_path": (tmp_path / "queue.db").as_posix()},
+    }
+    now = datetime.now(pytz.timezone("Asia/Tokyo"))
+    # Both topic feeds contain the same article
+    feed_df = pl.DataFrame(
+        [{"title": "shared", "link": "https://zenn.dev/a/articles/1", "published": now, "source": "zenn"}],
+        schema=expected_schema,
+    )
+    content: ContentData = {
+        "link": "https://zenn.dev/a/articles/1",
+        "tags": [],
+        "image_url": None,
+        "content": "c",
+        "author": "a",
+    }
+
+    def run_feed(lookback_hours, config, counts, **kwargs):
+        counts[config["feeds"][0]] = feed_df.shape[0]
+        return feed_df
+
+    with (
+        patch.object(ZennFeed, "run", side_effect=run_feed),
+        patch.object(Scraper, "_get_data", return_value=content),
+        patch.object(Summarizer, "_invoke", return_value=OutputText(summarized_text="summary")),
+        patch.object(Discord, "send_messages", new_callable=AsyncMock) as send_messages,
+    ):
+        asyncio.run(TechFeedsDigest(config).run_worker("w1"))
+        asyncio.run(TechFeedsDigest(config).run_worker("w2"))
+    assert send_messages.call_count == 1
+    assert send_messages.call_args.args[0][0]["summarized_text"] == "summary"
+
+
+def test_run_worker_requires_distributed_section():
+    config: AppConfig = {
+        "lookback_hours": 24,
+        "zenn": {"feeds": []},
+        "qiita": {"feeds": []},
+        "llm": {
+            "openai_model": "",
+            "language": "",
+            "temperature": 0.0,
+            "prompt": "",
+        },
+        "discord": {"webhook_url": "all"},
+    }
+    with pytest.raises(SystemExit) as e:
+        asyncio.run(TechFeedsDigest(config).run_worker("w1"))
+    assert e.value.code == 1
+
+
+def test_run_replaces_invalid_images(tmp_path):
+    config: AppConfig = {
+        "lookback_hours": 24,
+        "zenn": {"feeds": ["https://zenn.dev/topics/a/feed"]},
+        "qiita": {"feeds": []},
+        "llm": {
+            "openai_model": "",
+            "language": "",
+            "temperature": 0.0,
+            "prompt": "",
+        },
+        "discord": {"webhook_url": "all"},
+        "images": {"fallback_url": "https://example.com/default.png"},
+        "lock_path": (tmp_path / "run.lock").as_posix(),
+    }
+    now = datetime.now(pytz.timezone("Asia/Tokyo"))
+    feed_df = pl.DataFrame(
+        [{"title": "a", "link": "https://zenn.dev/a/articles/1", "published": now, "source": "zenn"}],
+        schema=expected_schema,
+    )
+    content: ContentData = {
+        "link": "https://zenn.dev/a/articles/1",
+        "tags": [],
+        "image_url": "https://example.com/broken.png",
+        "content": "c",
+        "author": "a",
+    }
+    with (
+        patch.object(ZennFeed, "run", return_value=feed_df),
+        patch.object(Scraper, "_get_data", return_value=content),
+        patch.object(Summarizer, "_invoke", return_value=OutputText(summarized_text="summary")),
+        patch.object(ImageValidator, "validate_all", new_callable=AsyncMock, return_value={content["image_url"]: False}),
+        patch.object(Discord, "send_messages", new_callable=AsyncMock, return_value=[]) as send_messages,
+    ):
+        asyncio.run(TechFeedsDigest(config).run())
+    assert send_messages.call_args.args[0][0]["image_url"] == "https://example.com/default.png"
+
+
+def make_state_config(tmp_path: pathlib.Path) -> AppConfig:
+    return {
+        "lookback_hours": 24,
+        "zenn": {"feeds": ["https://zenn.dev/topics/a/feed"]},
+        "qiita": {"feeds": []},
+        "llm": {
+            "openai_model": "",
+            "language": "",
+            "temperature": 0.0,
+            "prompt": "",
+        },
+        "discord": {"webhook_url": "all"},
+        "state_path": (tmp_path / "state.json").as_posix(),
+    }
+
+
+def make_slow_and_ok_feed() -> pl.DataFrame:
+    now = datetime.now(pytz.timezone("Asia/Tokyo"))
+    return pl.DataFrame(
+        [
+            {"title": "slow", "link": "https://zenn.dev/a/articles/slow", "published": now, "source": "zenn"},
+            {"title": "ok", "link": "https://zenn.dev/a/articles/ok", "published": now, "source": "zenn"},
+        ],
+        schema=expected_schema,
+    )
+
+
+def http_get_text(link: str, timeout: float) -> str:
+    if "slow" in link:
+        raise httpx.ReadTimeout("timed out")
+    return "---\ntitle: ok\n---\nbody" if link.endswith(".md") else "<html></html>"
+
+
+def test_run_defers_entries_that_time_out(tmp_path):
+    with (
+        patch.object(ZennFeed, "run", return_value=make_slow_and_ok_feed()),
+        patch.object(Scraper, "_http_get_text", side_effect=http_get_text),
+        patch.object(Summarizer, "_invoke", return_value=OutputText(summarized_text="summary")),
+        patch.object(Discord, "send_messages", new_callable=AsyncMock, return_value=[]) as send_messages,
+    ):
+        asyncio.run(TechFeedsDigest(make_state_config(tmp_path)).run())
+    assert [m["link"] for m in send_messages.call_args.args[0]] == ["https://zenn.dev/a/articles/ok"]
+    state = State.load(tmp_path / "state.json")
+    assert [e["link"] for e in state.pop_deferred()] == ["https://zenn.dev/a/articles/slow"]
+
+
+def test_run_saves_state_when_a_stage_fails(tmp_path):
+    with (
+        patch.object(ZennFeed, "run", return_value=make_slow_and_ok_feed()),
+        patch.object(Scraper, "_http_get_text", side_effect=http_get_text),
+        patch.object(Summarizer, "_invoke", side_effect=RuntimeError("boom")),
+        pytest.raises(RuntimeError),
+    ):
+        asyncio.run(TechFeedsDigest(make_state_config(tmp_path)).run())
+    state = State.load(tmp_path / "state.json")
+    assert [e["link"] for e in state.pop_deferred()] == ["https://zenn.dev/a/articles/slow"]
+
+
+def test_run_keeps_carried_over_entries_when_a_stage_fails(tmp_path):
+    config = make_state_config(tmp_path)
+    now = datetime.now(pytz.timezone("Asia/Tokyo"))
+    state = State.load(tmp_path / "state.json")
+    state.defer([{"title": "old", "link": "https://zenn.dev/a/articles/old", "published": now, "source": "zenn"}])
+    state.save()
+    with (
+        patch.object(ZennFeed, "run", return_value=pl.DataFrame([], schema=expected_schema)),
+        patch.object(Scraper, "_get_data", side_effect=KeyError("body")),
+        pytest.raises(KeyError),
+    ):
+        asyncio.run(TechFeedsDigest(config).run())
+    state = State.load(tmp_path / "state.json")
+    assert [e["link"] for e in state.pop_deferred()] == ["https://zenn.dev/a/articles/old"]
+
+
+def test_run_worker_releases_failing_feeds(tmp_path):
+    config = make_state_config(tmp_path)
+    config["distributed"] = {"queue_path": (tmp_path / "queue.db").as_posix()}
+    with patch.object(FeedParser, "fetch", side_effect=httpx.ConnectError("refused")) as fetch:
+        asyncio.run(TechFeedsDigest(config).run_worker("w1"))
+    # Released after each failure until max_attempts, instead of being marked done
+    assert fetch.call_count == 3
+
+
+def test_run_validates_images_of_taken_articles_only(tmp_path):
+    config = make_state_config(tmp_path)
+    config["images"] = {}
+    config["budget"] = {"max_tokens": 100, "output_tokens": 0}
+    contents = {
+        "https://zenn.dev/a/articles/slow": "x" * 10000,
+        "https://zenn.dev/a/articles/ok": "c",
+    }
+
+    def get_data(feed_data, timeout) -> ContentData:
+        link = feed_data["link"]
+        return {"link": link, "tags": [], "image_url": f"{link}.png", "content": contents[link], "author": "a"}
+
+    with (
+        patch.object(ZennFeed, "run", return_value=make_slow_and_ok_feed()),
+        patch.object(Scraper, "_get_data", side_effect=get_data),
+        patch.object(Summarizer, "_invoke", return_value=OutputText(summarized_text="summary")),
+        patch.object(ImageValidator, "_check", new_callable=AsyncMock, return_value=True) as check,
+        patch.object(Discord, "send_messages", new_callable=AsyncMock, return_value=[]),
+    ):
+        asyncio.run(TechFeedsDigest(config).run())
+    assert [c.args[1] for c in check.call_args_list] == ["https://zenn.dev/a/articles/ok.png"]
+
+
+def test_run_cancels_image_checks_when_summarizing_fails(tmp_path):
+    config = make_state_config(tmp_path)
+    config["images"] = {}
+    validate_all = ImageValidator.validate_all
+    tasks: list[asyncio.Task] = []
+    done_when_saved: list[bool] = []
+
+    async def track(self, urls):
+        tasks.append(asyncio.current_task())  # type:ignore
+        return await validate_all(self, urls)
+
+    with (
+        patch.object(ZennFeed, "run", return_value=make_slow_and_ok_feed()),
+        patch.object(Scraper, "_http_get_text", side_effect=http_get_text),
+        patch.object(Summarizer, "_invoke", side_effect=RuntimeError("boom")),
+        patch.object(ImageValidator, "validate_all", track),
+        patch.object(State, "save", side_effect=lambda: done_when_saved.append(tasks[0].done())),
+        pytest.raises(RuntimeError),
+    ):
+        asyncio.run(TechFeedsDigest(config).run())
+    # The check was cancelled before the run returned, not left to the event loop shutdown
+    assert done_when_saved == [True]
+    assert tasks[0].cancelled()
+
+
+def test_run_worker_replaces_invalid_images(tmp_path):
+    config = make_state_config(tmp_path)
+    config["distributed"] = {"queue_path": (tmp_path / "queue.db").as_posix()}
+    config["images"] = {"fallback_url": "https://example.com/default.png"}
+    feed_df = make_slow_and_ok_feed().tail(1)
+    content: ContentData = {
+        "link": "https://zenn.dev/a/articles/ok",
+        "tags": [],
+        "image_url": "https://example.com/broken.png",
+        "content": "c",
+        "author": "a",
+    }
+
+    def run_feed(lookback_hours, config, counts, **kwargs):
+        counts[config["feeds"][0]] = feed_df.shape[0]
+        return feed_df
+
+    with (
+        patch.object(ZennFeed, "run", side_effect=run_feed),
+        patch.object(Scraper, "_get_data", return_value=content),
+        patch.object(Summarizer, "_invoke", return_value=OutputText(summarized_text="summary")),
+        patch.object(ImageValidator, "validate_all", new_callable=AsyncMock, return_value={content["image_url"]: False}),
+        patch.object(Discord, "send_messages", new_callable=AsyncMock) as send_messages,
+    ):
+        asyncio.run(TechFeedsDigest(config).run_worker("w1"))
+    assert send_messages.call_args.args[0][0]["image_url"] == "https://example.com/default.png"
+
+
+def test_run_reloads_state_once_the_lock_is_held(tmp_path):
+    config = make_state_config(tmp_path)
+    config["lock_path"] = (tmp_path / "run.lock").as_posix()
+    digest = TechFeedsDigest(config)
+    # A previous run finishes and saves its state after this one was created
+    now = datetime.now(pytz.timezone("Asia/Tokyo"))
+    state = State.load(tmp_path / "state.json")
+    state.defer([{"title": "ok", "link": "https://zenn.dev/a/articles/ok", "published": now, "source": "zenn"}])
+    state.save()
+    with (
+        patch.object(ZennFeed, "run", return_value=pl.DataFrame([], schema=expected_schema)),
+        patch.object(Scraper, "_http_get_text", side_effect=http_get_text),
+        patch.object(Summarizer, "_invoke", return_value=OutputText(summarized_text="summary")),
+        patch.object(Discord, "send_messages", new_callable=AsyncMock, return_value=[]) as send_messages,
+    ):
+        asyncio.run(digest.run())
+    assert [m["link"] for m in send_messages.call_args.args[0]] == ["https://zenn.dev/a/articles/ok"]
@@ -0,0 +1,17 @@
+import pathlib
+import sys
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.lock import RunLock
+
+
+def test_second_lock_is_refused_until_released(tmp_path):
+    path = tmp_path / "state" / "run.lock"
+    first = RunLock(path)
+    second = RunLock(path)
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
@@ -0,0 +1,57 @@
+import pathlib
+import pstats
+import sys
+import threading
+import time
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.profiler import Profiler
+
+
+def busy_loop(seconds: float) -> int:
+    total = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        total += 1
+    return total
+
+
+def test_samples_are_attributed_to_stages(tmp_path):
+    with Profiler(tmp_path, interval=0.001) as profiler:
+        with profiler.stage("parse"):
+            busy_loop(0.2)
+        busy_loop(0.05)
+    lines = (tmp_path / "parse.collapsed").read_text(encoding="utf-8").splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert stack.split(";")[-1].startswith("busy_loop (test_profiler.py:")
+    assert not (tmp_path / "parse.prof").exists()
+
+
+def test_deterministic_profile_accumulates_stage(tmp_path):
+    with Profiler(tmp_path, deterministic=True) as profiler:
+        for _ in range(2):
+            with profiler.stage("summarize"):
+                busy_loop(0.01)
+    stats = pstats.Stats((tmp_path / "summarize.prof").as_posix())
+    calls = [v[1] for k, v in stats.stats.items() if k[2] == "busy_loop"]  # type: ignore[attr-defined]
+    assert calls == [2]
+
+
+def test_worker_thread_is_attributed_to_stage(tmp_path):
+    def work() -> None:
+        with profiler.worker():
+            busy_loop(0.2)
+
+    with Profiler(tmp_path, interval=0.001, deterministic=True) as profiler:
+        with profiler.stage("summarize"):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+    stacks = (tmp_path / "summarize.collapsed").read_text(encoding="utf-8").splitlines()
+    assert any(line.rsplit(" ", 1)[0].split(";")[-1].startswith("busy_loop (") for line in stacks)
+    stats = pstats.Stats((tmp_path / "summarize.prof").as_posix())
+    calls = [v[1] for k, v in stats.stats.items() if k[2] == "busy_loop"]  # type: ignore[attr-defined]
+    assert calls == [1]
@@ -1,17 +1,29 @@
 import pathlib
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from unittest.mock import patch
 
+import httpx
 import pytest
 import pytz
 
 sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
 
+from tech_feeds_digest.feed_parser import FeedParser
 from tech_feeds_digest.qiita_feed import QiitaFeed
+from tech_feeds_digest.state import State
 from tech_feeds_digest.types import QiitaConfig
 
 
+def to_atom(feed: dict) -> bytes:
+    entries = "".join(
+        f"<entry><title>{e['title']}</title><link rel='alternate' href='{e['link']}'/><published>{e['published']}</published></entry>"
+        for e in feed["entries"]
+    )
+    return f"<?xml version='1.0'?><feed xmlns='http://www.w3.org/2005/Atom'>{entries}</feed>".encode()
+
+
 @pytest.fixture
 def mock_feed():
     now = datetime.now(pytz.timezone("Asia/Tokyo"))
@@ -45,39 +57,43 @@ def test_convert_jst_dt_obj_invalid():
         QiitaFeed._convert_jst_dt_obj("invalid date")
 
 
-@patch("feedparser.parse")
-def test_parse_filters_by_time(mock_parse, mock_feed):
-    mock_parse.return_value = mock_feed
+@patch.object(FeedParser, "fetch")
+def test_parse_filters_by_time(mock_fetch, mock_feed):
+    mock_fetch.return_value = to_atom(mock_feed)
     result_df = QiitaFeed._parse("http://dummy", lookback_hours=24)
     titles = result_df["title"].to_list()
     assert "Recent Entry" in titles
     assert "Old Entry" not in titles
 
 
-@patch("feedparser.parse")
-def test_run_aggregates_feeds(mock_parse):
+@patch.object(FeedParser, "fetch")
+def test_run_aggregates_feeds(mock_fetch):
     now = datetime.now(pytz.timezone("Asia/Tokyo"))
     recent_time_str = now.isoformat()
     old_time_str = (now - timedelta(hours=25)).isoformat()
-    mock_parse.side_effect = [
-        {
-            "entries": [
-                {
-                    "title": "Recent Entry",
-                    "link": "http://example.com/recent",
-                    "published": recent_time_str,
-                }
-            ]
-        },
-        {
-            "entries": [
-                {
-                    "title": "Old Entry",
-                    "link": "http://example.com/old",
-                    "published": old_time_str,
-                }
-            ]
-        },
+    mock_fetch.side_effect = [
+        to_atom(
+            {
+                "entries": [
+                    {
+                        "title": "Recent Entry",
+                        "link": "http://example.com/recent",
+                        "published": recent_time_str,
+                    }
+                ]
+            }
+        ),
+        to_atom(
+            {
+                "entries": [
+                    {
+                        "title": "Old Entry",
+                        "link": "http://example.com/old",
+                        "published": old_time_str,
+                    }
+                ]
+            }
+        ),
     ]
     config: QiitaConfig = {"feeds": ["feed1", "feed2"]}
     df = QiitaFeed.run(lookback_hours=24, config=config)
@@ -89,3 +105,61 @@ def test_run_aggregates_feeds(mock_parse):
 def test_run_no_feeds():
     df = QiitaFeed.run(lookback_hours=24, config={"feeds": []})
     assert df.is_empty()
+
+
+@patch.object(FeedParser, "fetch")
+def test_parse_stops_at_high_water_mark(mock_fetch, tmp_path):
+    now = datetime.now(pytz.timezone("Asia/Tokyo"))
+    entries = [
+        {"title": f"Entry {i}", "link": f"http://example.com/{i}", "published": (now - timedelta(minutes=i)).isoformat()}
+        for i in range(3)
+    ]
+    state = State.load(tmp_path / "state.json")
+    mock_fetch.return_value = to_atom({"entries": entries[1:]})
+    df = QiitaFeed._parse("http://dummy", lookback_hours=24, state=state)
+    assert df["title"].to_list() == ["Entry 1", "Entry 2"]
+    state.commit()
+
+    mock_fetch.return_value = to_atom({"entries": entries})
+    df = QiitaFeed._parse("http://dummy", lookback_hours=24, state=state)
+    assert df["title"].to_list() == ["Entry 0"]
+    state.commit()
+    _, link = state.get_high_water_mark("http://dummy")
+    assert link == "http://example.com/0"
+
+    state.save()
+    df = QiitaFeed._parse("http://dummy", lookback_hours=24, state=State.load(tmp_path / "state.json"))
+    assert df.is_empty()
+
+
+@patch.object(FeedParser, "fetch")
+def test_run_with_executor(mock_fetch, mock_feed):
+    mock_fetch.return_value = to_atom(mock_feed)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        df = QiitaFeed.run(lookback_hours=24, config={"feeds": ["feed1", "feed2"]}, executor=executor)
+    assert df["title"].to_list() == ["Recent Entry"]
+    assert mock_fetch.call_count == 2
+
+
+@patch.object(FeedParser, "fetch")
+def test_run_with_per_feed_lookbacks(mock_fetch, mock_feed):
+    mock_fetch.return_value = to_atom(mock_feed)
+    counts: dict[str, int] = {}
+    df = QiitaFeed.run(lookback_hours=1, config={"feeds": ["feed1", "feed2"]}, lookbacks={"feed2": 48}, counts=counts)
+    assert sorted(df["title"].to_list()) == ["Old Entry", "Recent Entry"]
+    assert counts == {"feed1": 1, "feed2": 2}
+
+
+@patch.object(FeedParser, "fetch")
+def test_run_with_executor_skips_failing_feeds(mock_fetch, mock_feed):
+    request = httpx.Request("GET", "http://dummy")
+
+    def fetch(url, timeout):
+        if url == "gone":
+            raise httpx.HTTPStatusError("404", request=request, response=httpx.Response(404, request=request))
+        return to_atom(mock_feed)
+
+    mock_fetch.side_effect = fetch
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        df = QiitaFeed.run(lookback_hours=24, config={"feeds": ["gone", "good"]}, executor=executor)
+    assert df["title"].to_list() == ["Recent Entry"]
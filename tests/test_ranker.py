@@ -0,0 +1,60 @@
+import pathlib
+import sys
+from datetime import datetime, timedelta
+
+import pytz
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.ranker import Ranker
+from tech_feeds_digest.types import ScrapedData
+
+NOW = datetime(2025, 5, 1, 12, 0, tzinfo=pytz.timezone("Asia/Tokyo"))
+
+
+def make_scraped(title: str, tags: list[str], hours_ago: float = 0, source: str = "zenn", content: str = "") -> ScrapedData:
+    return {
+        "title": title,
+        "link": f"https://example.com/{title}",
+        "published": NOW - timedelta(hours=hours_ago),
+        "source": source,  # type:ignore
+        "tags": tags,
+        "image_url": None,
+        "content": content,
+        "author": "author",
+    }
+
+
+def test_rank_by_tag_weight():
+    ranker = Ranker({"tag_weights": {"MCP": 2.0, "rust": 1.0}}, now=NOW)
+    ranked = ranker.rank([make_scraped("a", ["go"]), make_scraped("b", ["mcp"]), make_scraped("c", ["Rust"])])
+    assert [r["title"] for r in ranked] == ["b", "c", "a"]
+
+
+def test_rank_by_recency_and_source():
+    ranker = Ranker({"source_weights": {"qiita": 0.1}}, now=NOW)
+    ranked = ranker.rank(
+        [
+            make_scraped("old", [], hours_ago=24),
+            make_scraped("new", [], hours_ago=0),
+            make_scraped("old-qiita", [], hours_ago=24, source="qiita"),
+        ]
+    )
+    assert [r["title"] for r in ranked] == ["new", "old-qiita", "old"]
+
+
+def test_negative_length_weight_prefers_short_articles():
+    ranker = Ranker({"length_weight": -1.0}, now=NOW)
+    ranked = ranker.rank([make_scraped("long", [], content="x" * 20000), make_scraped("short", [], content="x")])
+    assert [r["title"] for r in ranked] == ["short", "long"]
+
+
+def test_rank_entries_before_scraping():
+    ranker = Ranker({"tag_weights": {"MCP": 2.0}, "source_weights": {"qiita": 0.5}}, now=NOW)
+    entries = [
+        {"title": "Goの話", "link": "a", "published": NOW, "source": "zenn"},
+        {"title": "MCPサーバーを作る", "link": "b", "published": NOW - timedelta(hours=24), "source": "zenn"},
+        {"title": "Pythonの話", "link": "c", "published": NOW, "source": "qiita"},
+    ]
+    ranked = ranker.rank_entries(entries)  # type:ignore
+    assert [r["link"] for r in ranked] == ["b", "c", "a"]
@@ -0,0 +1,67 @@
+import pathlib
+import sys
+from datetime import datetime
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.router import Router
+from tech_feeds_digest.types import SummarizedData
+
+
+def make_message(tags: list[str], source: str = "zenn") -> SummarizedData:
+    return {
+        "title": "title",
+        "link": "https://example.com",
+        "published": datetime.now(),
+        "source": source,  # type:ignore
+        "tags": tags,
+        "image_url": None,
+        "author": "author",
+        "summarized_text": "summary",
+    }
+
+
+def test_route_by_tag_case_insensitive():
+    router = Router(
+        [
+            {"webhook_url": "rust", "tags": ["Rust"]},
+            {"webhook_url": "ai", "tags": ["LLM", "MCP"]},
+        ]
+    )
+    urls = [s["webhook_url"] for s in router.route(make_message(["rust", "mcp"]))]
+    assert urls == ["rust", "ai"]
+    assert router.route(make_message(["go"])) == []
+
+
+def test_route_by_source_and_catch_all():
+    router = Router.from_config(
+        {
+            "webhook_url": "all",
+            "subscriptions": [
+                {"webhook_url": "qiita-python", "tags": ["python"], "sources": ["qiita"]},
+            ],
+        }
+    )
+    urls = [s["webhook_url"] for s in router.route(make_message(["python"], source="zenn"))]
+    assert urls == ["all"]
+    urls = [s["webhook_url"] for s in router.route(make_message(["Python"], source="qiita"))]
+    assert urls == ["qiita-python", "all"]
+
+
+def test_from_config_without_webhook():
+    router = Router.from_config({"webhook_url": ""})
+    assert router.route(make_message(["python"])) == []
+
+
+def test_route_posts_once_per_webhook():
+    router = Router.from_config(
+        {
+            "webhook_url": "all",
+            "subscriptions": [
+                {"webhook_url": "lang", "tags": ["rust"]},
+                {"webhook_url": "lang", "tags": ["go"]},
+                {"webhook_url": "all", "sources": ["zenn"]},
+            ],
+        }
+    )
+    assert [s["webhook_url"] for s in router.route(make_message(["rust", "go"]))] == ["lang", "all"]
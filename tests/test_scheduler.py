@@ -0,0 +1,49 @@
+import pathlib
+import sys
+from datetime import datetime, timedelta
+
+import pytz
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.scheduler import PollScheduler
+from tech_feeds_digest.state import State
+
+START = datetime(2025, 5, 1, 0, 0, tzinfo=pytz.timezone("Asia/Tokyo"))
+
+
+def test_new_feeds_are_polled_with_configured_lookback():
+    scheduler = PollScheduler({}, State())
+    assert scheduler.plan(["a", "b"], 1, START) == {"a": 1, "b": 1}
+
+
+def test_busy_feed_is_polled_every_run_and_quiet_feed_backs_off():
+    state = State()
+    scheduler = PollScheduler({"max_interval_hours": 12, "target_entries_per_poll": 2}, state)
+    polled = {"busy": 0, "quiet": 0}
+    for hour in range(24):
+        now = START + timedelta(hours=hour)
+        lookbacks = scheduler.plan(["busy", "quiet"], 1, now)
+        for url in lookbacks:
+            polled[url] += 1
+        scheduler.record({url: 5 if url == "busy" else 0 for url in lookbacks}, lookbacks, now)
+        state.commit()
+    assert polled == {"busy": 24, "quiet": 2}
+
+
+def test_skipped_runs_are_covered_by_lookback():
+    state = State()
+    scheduler = PollScheduler({"max_interval_hours": 6}, state)
+    scheduler.record({"a": 0}, {"a": 1}, START)
+    state.commit()
+    assert scheduler.plan(["a"], 1, START + timedelta(hours=3)) == {}
+    # Due within the slack of the scheduled time
+    lookbacks = scheduler.plan(["a"], 1, START + timedelta(hours=6, minutes=-2))
+    assert 5.9 < lookbacks["a"] < 6
+
+
+def test_interval_is_clamped():
+    scheduler = PollScheduler({"min_interval_hours": 1, "max_interval_hours": 24, "target_entries_per_poll": 5}, State())
+    assert scheduler.interval_hours(0) == 24
+    assert scheduler.interval_hours(100) == 1
+    assert scheduler.interval_hours(0.5) == 10
@@ -1,5 +1,6 @@
 import pathlib
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from unittest.mock import patch
 
@@ -129,3 +130,52 @@ def test_http_status_error_skips(monkeypatch):
     ]
     result = scraper.Scraper.run(feed_list)
     assert result == []
+
+
+def test_iter_run_is_lazy():
+    mock_content = {"link": "link", "tags": [], "content": "", "author": ""}
+
+    with patch.object(scraper.Scraper, "_get_data", return_value=mock_content) as mock_get_data:
+        feed_list: list[FeedData] = [
+            {"title": "t1", "link": "l1", "source": "qiita"},  # type:ignore
+            {"title": "t2", "link": "l2", "source": "zenn"},  # type:ignore
+        ]
+        it = scraper.Scraper.iter_run(feed_list)
+        assert mock_get_data.call_count == 0
+        first = next(it)
+        assert first["title"] == "t1"
+        assert mock_get_data.call_count == 1
+        assert len(list(it)) == 1
+
+
+ZENN_HTML = """
+<html><head><meta property="og:image" content="https://example.com/og.png"></head>
+<body>
+<div class="View_topics__2sHkl"><a class="View_topicLink__jdtX_">Rust</a><a class="View_topicLink__jdtX_">Go</a></div>
+<div class="znc BodyContent_anchorToHeadings__uGxNv"><p>Body</p></div>
+<a class="ProfileCard_displayName__gRUeY">Zenn Author</a>
+</body></html>
+"""
+
+
+def test_parse_zenn_data():
+    result = scraper.Scraper._parse_zenn_data("https://zenn.dev/sample", ZENN_HTML)
+    assert result["tags"] == ["Rust", "Go"]
+    assert result["content"] == "Body"
+    assert result["author"] == "Zenn Author"
+    assert result["image_url"] == "https://example.com/og.png"
+
+
+def test_iter_run_with_process_pool_keeps_order():
+    feed_list: list[FeedData] = [
+        {"title": f"t{i}", "link": f"https://zenn.dev/{i}", "source": "zenn"}  # type:ignore
+        for i in range(5)
+    ]
+    with (
+        patch.object(scraper.Scraper, "_fetch_raw", return_value=(ZENN_HTML,)),
+        ProcessPoolExecutor(max_workers=2) as executor,
+    ):
+        results = list(scraper.Scraper.iter_run(feed_list, executor, max_pending=2))
+    assert [r["title"] for r in results] == [f"t{i}" for i in range(5)]
+    assert [r["link"] for r in results] == [f"https://zenn.dev/{i}" for i in range(5)]
+    assert all(r["author"] == "Zenn Author" for r in results)
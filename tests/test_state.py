@@ -0,0 +1,96 @@
+import pathlib
+import sys
+from datetime import datetime, timedelta
+
+import pytz
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.state import State
+from tech_feeds_digest.types import FeedData
+
+
+def test_load_missing_file(tmp_path):
+    state = State.load(tmp_path / "missing.json")
+    assert state.get_high_water_mark("feed") == (None, None)
+
+
+def test_load_broken_file(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("{broken")
+    state = State.load(path)
+    assert state.data == {"feeds": {}, "deferred": [], "polls": {}, "images": {}}
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "nested" / "state.json"
+    published = datetime(2025, 5, 1, 12, 0, tzinfo=pytz.UTC)
+    state = State.load(path)
+    state.set_high_water_mark("feed", published, "https://example.com")
+    state.commit()
+    state.save()
+    assert State.load(path).get_high_water_mark("feed") == (published, "https://example.com")
+
+
+def test_save_without_path_is_noop():
+    state = State.load(None)
+    state.set_high_water_mark("feed", datetime.now(pytz.UTC), "link")
+    state.save()
+    assert state.path is None
+
+
+def test_defer_and_pop_deferred(tmp_path):
+    path = tmp_path / "state.json"
+    now = datetime.now(pytz.UTC)
+    state = State.load(path)
+    entries: list[FeedData] = [
+        {"title": "new", "link": "https://example.com/new", "published": now, "source": "zenn"},
+        {"title": "old", "link": "https://example.com/old", "published": now - timedelta(days=3), "source": "qiita"},
+    ]
+    state.defer(entries)
+    state.defer(entries[:1])
+    state.save()
+
+    loaded = State.load(path)
+    popped = loaded.pop_deferred(not_before=now - timedelta(days=1))
+    assert [e["title"] for e in popped] == ["new"]
+    assert popped[0]["published"] == now
+    assert loaded.pop_deferred() == []
+
+
+def test_popped_entries_stay_until_commit(tmp_path):
+    path = tmp_path / "state.json"
+    now = datetime.now(pytz.UTC)
+    state = State.load(path)
+    state.defer(
+        [
+            {"title": "a", "link": "https://example.com/a", "published": now, "source": "zenn"},
+            {"title": "b", "link": "https://example.com/b", "published": now, "source": "zenn"},
+        ]
+    )
+    state.save()
+
+    state = State.load(path)
+    popped = state.pop_deferred()
+    state.save()
+    assert [e["title"] for e in State.load(path).pop_deferred()] == ["a", "b"]
+    state.defer(popped[1:])
+    state.commit()
+    state.save()
+    assert [e["title"] for e in State.load(path).pop_deferred()] == ["b"]
+
+
+def test_uncommitted_marks_are_not_saved(tmp_path):
+    path = tmp_path / "state.json"
+    now = datetime.now(pytz.UTC)
+    state = State.load(path)
+    state.set_high_water_mark("feed", now, "link")
+    state.set_poll("feed", now, now, 1.0)
+    assert state.get_high_water_mark("feed") == (None, None)
+    state.save()
+    loaded = State.load(path)
+    assert loaded.get_high_water_mark("feed") == (None, None)
+    assert loaded.get_poll("feed") is None
+    state.commit()
+    assert state.get_high_water_mark("feed") == (now, "link")
+    assert state.get_poll("feed") is not None
@@ -0,0 +1,209 @@
+import pathlib
+import sys
+from datetime import datetime
+from unittest.mock import patch
+
+import httpx
+import openai
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.budget import Budget
+from tech_feeds_digest.summarizer import (
+    ArticleOutputText,
+    ClusterOutputText,
+    LanguageOutputText,
+    MultiLanguageOutputText,
+    OutputText,
+    RatedOutputText,
+    Summarizer,
+)
+from tech_feeds_digest.types import LLMConfig, ScrapedData
+
+
+def make_config(**kwargs) -> LLMConfig:
+    config: LLMConfig = {
+        "openai_model": "",
+        "language": "Japanese",
+        "temperature": 0.0,
+        "prompt": "Language: {language}",
+    }
+    config.update(kwargs)  # type:ignore
+    return config
+
+
+def make_scraped(link: str = "https://example.com") -> ScrapedData:
+    return {
+        "title": "title",
+        "link": link,
+        "published": datetime.now(),
+        "source": "zenn",
+        "tags": [],
+        "image_url": None,
+        "content": "content",
+        "author": "author",
+    }
+
+
+def test_iter_run_releases_content():
+    s = Summarizer(make_config())
+    with patch.object(Summarizer, "_invoke", return_value=OutputText(summarized_text="要約")):
+        results = list(s.iter_run([make_scraped()], release_content=True))
+    assert results[0]["summarized_text"] == "要約"
+    assert "content" not in results[0]
+
+
+def test_iter_run_collects_failed_requests():
+    s = Summarizer(make_config())
+    timeout = openai.APITimeoutError(request=httpx.Request("POST", "https://api.openai.com"))
+    failed: list[ScrapedData] = []
+    with patch.object(Summarizer, "_invoke", side_effect=[timeout, OutputText(summarized_text="要約")]):
+        results = list(s.iter_run([make_scraped("a"), make_scraped("b")], failed=failed))
+    assert [r["link"] for r in results] == ["b"]
+    assert [f["link"] for f in failed] == ["a"]
+
+
+def test_iter_run_clusters_collects_failed_clusters():
+    s = Summarizer(make_config())
+    timeout = openai.APITimeoutError(request=httpx.Request("POST", "https://api.openai.com"))
+    failed: list[ScrapedData] = []
+    with patch.object(Summarizer, "_invoke", side_effect=timeout):
+        results = list(s.iter_run_clusters([[make_scraped("a"), make_scraped("b")]], failed=failed))
+    assert results == []
+    assert [f["link"] for f in failed] == ["a", "b"]
+
+
+def test_iter_run_multiple_languages_single_call():
+    s = Summarizer(make_config(languages=["Japanese", "English"]))
+    output = MultiLanguageOutputText(
+        summaries=[
+            LanguageOutputText(language="japanese", summarized_text="要約"),
+            LanguageOutputText(language="English", summarized_text="summary"),
+        ]
+    )
+    with patch.object(Summarizer, "_invoke", return_value=output) as mock_invoke:
+        results = s.run([make_scraped()])  # type:ignore
+    assert mock_invoke.call_count == 1
+    assert "Japanese, English" in mock_invoke.call_args.args[0]
+    assert results[0]["summarized_text"] == "要約"
+    assert results[0]["summarized_texts"] == {"Japanese": "要約", "English": "summary"}
+
+
+def test_iter_run_skips_when_primary_language_missing():
+    s = Summarizer(make_config(languages=["Japanese", "English"]))
+    output = MultiLanguageOutputText(summaries=[LanguageOutputText(language="English", summarized_text="summary")])
+    with patch.object(Summarizer, "_invoke", return_value=output):
+        results = s.run([make_scraped()])  # type:ignore
+    assert results == []
+
+
+class FakeModels:
+    """
+    Offline stand-in for the LLM that answers by model name and records which models were called.
+    """
+
+    def __init__(self, confidence: float):
+        self.confidence = confidence
+        self.calls: list[str | None] = []
+
+    def __call__(self, system_content, content, output_model, model=None):
+        self.calls.append(model)
+        if output_model is RatedOutputText:
+            return RatedOutputText(summarized_text=f"cheap summary of {len(content)} chars", confidence=self.confidence)
+        return OutputText(summarized_text="strong summary")
+
+
+def make_cascade_config() -> LLMConfig:
+    return make_config(
+        openai_model="strong",
+        cascade={"cheap_model": "cheap", "extractive_max_chars": 20, "cheap_max_chars": 1000, "min_summary_chars": 5},
+    )
+
+
+def test_cascade_extractive_without_llm():
+    s = Summarizer(make_cascade_config())
+    fake = FakeModels(confidence=0.9)
+    scraped = make_scraped()
+    scraped["content"] = "短い記事です。"
+    with patch.object(Summarizer, "_invoke", side_effect=fake):
+        results = s.run([scraped])  # type:ignore
+    assert fake.calls == []
+    assert results[0]["summarized_text"] == "短い記事です。"
+
+
+def test_cascade_cheap_and_escalation():
+    s = Summarizer(make_cascade_config())
+    scraped = make_scraped()
+    scraped["content"] = "普通の長さの記事です。" * 10
+
+    fake = FakeModels(confidence=0.9)
+    with patch.object(Summarizer, "_invoke", side_effect=fake):
+        results = s.run([scraped])  # type:ignore
+    assert fake.calls == ["cheap"]
+    assert results[0]["summarized_text"].startswith("cheap summary")
+
+    fake = FakeModels(confidence=0.2)
+    with patch.object(Summarizer, "_invoke", side_effect=fake):
+        results = s.run([scraped])  # type:ignore
+    assert fake.calls == ["cheap", None]
+    assert results[0]["summarized_text"] == "strong summary"
+
+
+def test_budget_priced_by_routed_model_and_charged_on_escalation():
+    budget = Budget({"cost_per_million_tokens": 10.0, "model_costs": {"cheap": 1.0}, "output_tokens": 0})
+    s = Summarizer(make_cascade_config(), budget=budget)
+    short, medium, long = make_scraped(), make_scraped(), make_scraped()
+    short["content"] = "短い記事です。"
+    medium["content"] = "普" * 100
+    long["content"] = "長" * 2000
+    assert [s.model_for(x) for x in (short, medium, long)] == [None, "cheap", "strong"]
+    deferred: list[ScrapedData] = []
+    fake = FakeModels(confidence=0.2)
+    with patch.object(Summarizer, "_invoke", side_effect=fake):
+        list(s.iter_run(budget.take([short, medium], deferred, s.model_for)))
+    # The cheap reservation plus the escalation to the strong model; the extractive summary is free
+    assert budget.used_tokens == 200
+    assert budget.used_cost == 100 * 1.0 / 1_000_000 + 100 * 10.0 / 1_000_000
+
+
+def test_cascade_long_article_goes_to_strong_model():
+    s = Summarizer(make_cascade_config())
+    scraped = make_scraped()
+    scraped["content"] = "長" * 2000
+    fake = FakeModels(confidence=0.9)
+    with patch.object(Summarizer, "_invoke", side_effect=fake):
+        results = s.run([scraped])  # type:ignore
+    assert fake.calls == [None]
+    assert results[0]["summarized_text"] == "strong summary"
+
+
+def test_iter_run_clusters_single_call_per_cluster():
+    s = Summarizer(make_config())
+    cluster = [make_scraped("https://example.com/1"), make_scraped("https://example.com/2")]
+    output = ClusterOutputText(
+        combined_summary="共通の話題",
+        summaries=[
+            ArticleOutputText(article=2, summarized_text="二つ目"),
+            ArticleOutputText(article=1, summarized_text="一つ目"),
+        ],
+    )
+    with patch.object(Summarizer, "_invoke", return_value=output) as mock_invoke:
+        results = list(s.iter_run_clusters([cluster], release_content=True))
+    assert mock_invoke.call_count == 1
+    assert "[Article 2]" in mock_invoke.call_args.args[1]
+    assert [r["summarized_text"] for r in results] == ["一つ目", "二つ目"]
+    assert all(r["cluster_summary"] == "共通の話題" and r["cluster_id"] == 0 for r in results)
+    assert all("content" not in r for r in results)
+
+
+def test_iter_run_clusters_falls_back_for_missing_articles():
+    s = Summarizer(make_config())
+    cluster = [make_scraped("https://example.com/1"), make_scraped("https://example.com/2")]
+    outputs = [
+        ClusterOutputText(combined_summary="話題", summaries=[ArticleOutputText(article=1, summarized_text="一つ目")]),
+        OutputText(summarized_text="個別"),
+    ]
+    with patch.object(Summarizer, "_invoke", side_effect=outputs):
+        results = list(s.iter_run_clusters([cluster]))
+    assert [r["summarized_text"] for r in results] == ["一つ目", "個別"]
+    assert "cluster_id" not in results[1]
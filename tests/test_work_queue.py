@@ -0,0 +1,103 @@
+import pathlib
+import sys
+import time
+
+sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
+
+from tech_feeds_digest.work_queue import Heartbeat, SQLiteWorkQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_enqueue_is_deduplicated_globally(tmp_path):
+    path = tmp_path / "queue.db"
+    q1 = SQLiteWorkQueue(path)
+    q2 = SQLiteWorkQueue(path)
+    assert q1.enqueue("article", "https://example.com/a", {"title": "a"})
+    assert not q2.enqueue("article", "https://example.com/a", {"title": "a"})
+    assert q2.enqueue("feed", "https://example.com/a", {})
+
+
+def test_claim_is_exclusive_until_lease_expires(tmp_path):
+    clock = FakeClock()
+    q = SQLiteWorkQueue(tmp_path / "queue.db", lease_seconds=60, clock=clock)
+    q.enqueue("article", "a", {"title": "a"})
+    q.enqueue("article", "b", {"title": "b"})
+    claimed = q.claim("article", "w1", limit=1)
+    assert [i["key"] for i in claimed] == ["a"]
+    assert claimed[0]["payload"] == {"title": "a"}
+    assert [i["key"] for i in q.claim("article", "w2", limit=5)] == ["b"]
+    assert q.claim("article", "w3") == []
+
+    clock.now += 30
+    assert q.heartbeat([claimed[0]["id"]], "w1") == 1
+    clock.now += 45
+    assert [i["key"] for i in q.claim("article", "w3")] == ["b"]
+    clock.now += 60
+    reclaimed = q.claim("article", "w3")
+    assert sorted(i["key"] for i in reclaimed) == ["a"]
+    assert not q.complete(claimed[0]["id"], "w1")
+    assert q.complete(reclaimed[0]["id"], "w3")
+
+
+def test_delivery_happens_at_most_once(tmp_path):
+    clock = FakeClock()
+    q = SQLiteWorkQueue(tmp_path / "queue.db", lease_seconds=60, clock=clock)
+    q.enqueue("article", "a", {})
+    item = q.claim("article", "w1")[0]
+    assert q.start_delivery(item["id"], "w1")
+    clock.now += 120
+    assert q.claim("article", "w2") == []
+    assert q.complete(item["id"], "w1")
+
+
+def test_lost_lease_prevents_delivery(tmp_path):
+    clock = FakeClock()
+    q = SQLiteWorkQueue(tmp_path / "queue.db", lease_seconds=60, clock=clock)
+    q.enqueue("article", "a", {})
+    item = q.claim("article", "w1")[0]
+    clock.now += 120
+    assert q.claim("article", "w2")
+    assert not q.start_delivery(item["id"], "w1")
+
+
+def test_release_and_max_attempts(tmp_path):
+    q = SQLiteWorkQueue(tmp_path / "queue.db", max_attempts=2)
+    q.enqueue("feed", "f", {})
+    for _ in range(2):
+        item = q.claim("feed", "w1")[0]
+        assert q.release(item["id"], "w1")
+    assert q.claim("feed", "w1") == []
+
+
+def test_prune_removes_only_old_finished_items(tmp_path):
+    clock = FakeClock()
+    q = SQLiteWorkQueue(tmp_path / "queue.db", max_attempts=1, clock=clock)
+    for key in ("done", "failed", "pending"):
+        q.enqueue("article", key, {})
+    done, failed = q.claim("article", "w1", 2)
+    assert q.complete(done["id"], "w1")
+    clock.now += 400
+    # Marks "failed" as failed and leases "pending"
+    assert [item["key"] for item in q.claim("article", "w1")] == ["pending"]
+    assert q.prune(300) == 1
+    assert q.enqueue("article", "done", {})
+    assert not q.enqueue("article", "failed", {})
+    clock.now += 400
+    assert q.prune(300) == 1
+    assert not q.enqueue("article", "pending", {})
+
+
+def test_heartbeat_thread_extends_lease(tmp_path):
+    q = SQLiteWorkQueue(tmp_path / "queue.db", lease_seconds=0.3)
+    q.enqueue("article", "a", {})
+    item = q.claim("article", "w1")[0]
+    with Heartbeat(q, "w1", [item["id"]], interval=0.05):
+        time.sleep(0.5)
+        assert q.claim("article", "w2") == []
@@ -1,16 +1,31 @@
 import pathlib
 import sys
 from datetime import datetime, timedelta
+from unittest.mock import patch
 
+import httpx
 import pytest
 import pytz
 
 sys.path.append(pathlib.Path(__file__).parent.parent.as_posix())
 
 
+from tech_feeds_digest.feed_parser import FeedParser
+from tech_feeds_digest.state import State
 from tech_feeds_digest.zenn_feed import ZennFeed
 
 
+def to_rss(entries: list[dict]) -> bytes:
+    items = "".join(
+        f"<item><title>{e['title']}</title><link>{e['link']}</link><pubDate>{e['published']}</pubDate></item>" for e in entries
+    )
+    return f"<?xml version='1.0'?><rss version='2.0'><channel>{items}</channel></rss>".encode()
+
+
+def rfc822(dt: datetime) -> str:
+    return dt.astimezone(pytz.timezone("GMT")).strftime("%a, %d %b %Y %H:%M:%S %Z")
+
+
 @pytest.fixture
 def mock_feed():
     now = datetime.now(pytz.timezone("GMT"))
@@ -90,3 +105,61 @@ def test_run_aggregates_feeds(mock_parse):
 def test_run_no_feeds():
     df = ZennFeed.run(lookback_hours=24, config={"feeds": []})
     assert df.is_empty()
+
+
+@patch.object(FeedParser, "fetch")
+def test_parse_stops_at_high_water_mark(mock_fetch, tmp_path):
+    now = datetime.now(pytz.timezone("Asia/Tokyo"))
+    entries = [
+        {"title": f"Entry {i}", "link": f"http://example.com/{i}", "published": rfc822(now - timedelta(minutes=i))}
+        for i in range(3)
+    ]
+    state = State.load(tmp_path / "state.json")
+    mock_fetch.return_value = to_rss(entries[1:])
+    df = ZennFeed._parse("http://dummy", lookback_hours=24, state=state)
+    assert df["title"].to_list() == ["Entry 1", "Entry 2"]
+    # The mark only moves once the run commits
+    assert ZennFeed._parse("http://dummy", lookback_hours=24, state=state).shape[0] == 2
+    state.commit()
+
+    mock_fetch.return_value = to_rss(entries)
+    df = ZennFeed._parse("http://dummy", lookback_hours=24, state=state)
+    assert df["title"].to_list() == ["Entry 0"]
+    state.commit()
+    assert state.get_high_water_mark("http://dummy")[1] == "http://example.com/0"
+
+    state.save()
+    df = ZennFeed._parse("http://dummy", lookback_hours=24, state=State.load(tmp_path / "state.json"))
+    assert df.is_empty()
+
+
+@patch.object(FeedParser, "fetch")
+def test_parse_stops_at_lookback(mock_fetch):
+    now = datetime.now(pytz.timezone("Asia/Tokyo"))
+    mock_fetch.return_value = to_rss(
+        [
+            {"title": "Recent Entry", "link": "http://example.com/recent", "published": rfc822(now)},
+            {"title": "Old Entry", "link": "http://example.com/old", "published": rfc822(now - timedelta(hours=49))},
+        ]
+    )
+    df = ZennFeed._parse("http://dummy", lookback_hours=24)
+    assert df["title"].to_list() == ["Recent Entry"]
+
+
+@patch.object(FeedParser, "fetch")
+def test_run_skips_failing_feeds(mock_fetch, mock_feed, tmp_path):
+    def fetch(url, timeout):
+        if url == "timeout":
+            raise httpx.ReadTimeout("timed out")
+        if url == "malformed":
+            return to_rss([{"title": "No Date", "link": "http://example.com/no-date", "published": ""}])
+        return to_rss(mock_feed["entries"])
+
+    mock_fetch.side_effect = fetch
+    state = State.load(tmp_path / "state.json")
+    counts: dict[str, int] = {}
+    df = ZennFeed.run(lookback_hours=24, config={"feeds": ["timeout", "malformed", "good"]}, state=state, counts=counts)
+    assert sorted(df["title"].to_list()) == ["Old Entry", "Recent Entry"]
+    assert counts == {"good": 2}
+    state.commit()
+    assert state.get_high_water_mark("malformed") == (None, None)